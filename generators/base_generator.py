@@ -120,10 +120,19 @@ class BaseGenerator(ABC):
         """Génère l'image à partir du contenu."""
         pass
 
-    def save(self, image: Image.Image, filename: str) -> Path:
-        """Sauvegarde l'image générée."""
+    def save(self, image: Image.Image, filename: str, compress_level: int = 1) -> Path:
+        """
+        Sauvegarde l'image générée.
+        
+        Args:
+            image: Image à sauvegarder
+            filename: Nom du fichier dans GENERATED_DIR
+            compress_level: Niveau zlib du PNG (0-9). 1 par défaut : les images
+                générées sont des fichiers de staging ré-encodés par Instagram,
+                inutile de payer la compression maximale.
+        """
         output_path = GENERATED_DIR / filename
-        image.save(output_path, "PNG", quality=95)
+        image.save(output_path, "PNG", compress_level=compress_level)
         return output_path
 
     def preview(self, image: Image.Image) -> None:
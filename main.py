@@ -22,7 +22,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from config.settings import DATA_DIR, GENERATED_DIR
 from generators import ChiffreGenerator, PhraseGenerator, PhotoGenerator
-from services.instagram_service import InstagramService, check_instagram_availability
+from services.instagram_service import InstagramService, check_instagram_availability, format_hashtags
 from services.replicate_service import ReplicateService, check_replicate_availability
 from services.unsplash_service import UnsplashService, check_unsplash_availability
 
@@ -88,7 +88,7 @@ def format_caption(post: dict) -> str:
     hashtags = caption_data.get("hashtags", [])
     if hashtags:
         parts.append("")  # Ligne vide
-        parts.append(" ".join([f"#{tag}" for tag in hashtags]))
+        parts.append(format_hashtags(hashtags))
     
     return "\n".join(parts)
 
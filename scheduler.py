@@ -13,6 +13,7 @@ Commandes:
 import json
 import random
 import sys
+from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Optional
@@ -24,7 +25,7 @@ sys.path.insert(0, str(Path(__file__).parent))
 
 from config.settings import DATA_DIR, GENERATED_DIR
 from generators import ChiffreGenerator, PhraseGenerator, PhotoGenerator
-from services.instagram_service import InstagramService, check_instagram_availability
+from services.instagram_service import InstagramService, check_instagram_availability, format_hashtags
 from services.claude_service import ClaudeService, check_claude_availability
 from services.unsplash_service import UnsplashService, check_unsplash_availability
 
@@ -143,7 +144,7 @@ def format_caption(post: dict) -> str:
     hashtags = caption_data.get("hashtags", [])
     if hashtags:
         parts.append("")  # Ligne vide
-        parts.append(" ".join([f"#{tag}" for tag in hashtags]))
+        parts.append(format_hashtags(hashtags))
     
     result = "\n".join(parts)
 
@@ -194,12 +195,20 @@ def generate_content(count: int, dry_run: bool):
     
     generated_posts = []
     
+    # Phrases et chiffres sont générés en parallèle : on attend la plus lente, pas la somme
+    click.echo(f"\n--- Appels Claude en parallèle ({phrases_count + chiffres_count}) ---")
+    results = claude_service.generate_concurrently(
+        [("phrase", None)] * phrases_count + [("chiffre", None)] * chiffres_count
+    )
+    phrase_results, chiffre_results = results[:phrases_count], results[phrases_count:]
+    
     # Générer les phrases
     click.echo(f"\n--- Génération de {phrases_count} phrases ---")
-    for i in range(phrases_count):
+    for i, result in enumerate(phrase_results):
         try:
             click.echo(f"  Génération phrase {i+1}/{phrases_count}...")
-            result = claude_service.generate_phrase()
+            if isinstance(result, Exception):
+                raise result
             
             post_id = get_next_id("phrase", data)
             new_post = {
@@ -223,10 +232,11 @@ def generate_content(count: int, dry_run: bool):
     
     # Générer les chiffres
     click.echo(f"\n--- Génération de {chiffres_count} chiffres ---")
-    for i in range(chiffres_count):
+    for i, result in enumerate(chiffre_results):
         try:
             click.echo(f"  Génération chiffre {i+1}/{chiffres_count}...")
-            result = claude_service.generate_chiffre()
+            if isinstance(result, Exception):
+                raise result
             
             post_id = get_next_id("chiffre", data)
             new_post = {
@@ -252,12 +262,19 @@ def generate_content(count: int, dry_run: bool):
         unsplash_service = UnsplashService()
         photo_generator = PhotoGenerator()
         
-        for i in range(photos_count):
+        # Tirer les presets d'avance : un preset tiré plusieurs fois ne coûte qu'une recherche
+        presets = [unsplash_service.get_random_preset() for _ in range(photos_count)]
+        repeated = [key for key, n in Counter(key for key, _ in presets).items() if n > 1]
+        if repeated:
+            try:
+                unsplash_service.prefetch(repeated)
+            except Exception as e:
+                click.echo(f"  Préchargement Unsplash impossible: {e}", err=True)
+        
+        for i, (preset_key, preset_query) in enumerate(presets):
             try:
                 click.echo(f"  Génération photo {i+1}/{photos_count}...")
                 
-                # Obtenir un preset aléatoire
-                preset_key, preset_query = unsplash_service.get_random_preset()
                 photo = unsplash_service.get_random_photo(preset_key, orientation="portrait")
                 
                 if not photo:
@@ -297,13 +314,28 @@ def generate_content(count: int, dry_run: bool):
             except Exception as e:
                 click.echo(f"    Erreur: {e}", err=True)
     
-    # Sauvegarder
-    save_content(data)
+    if not generated_posts:
+        click.echo("\n=== Génération terminée ===")
+        click.echo("Aucun post créé, content.json inchangé.")
+        return
     
     # Générer les images pour les nouveaux posts
     click.echo(f"\n--- Génération des images ---")
     GENERATED_DIR.mkdir(exist_ok=True)
     
+    # Une seule sauvegarde en fin de run ; le finally garde les textes générés
+    # même si la génération d'images est interrompue.
+    try:
+        _generate_images(generated_posts, data)
+    finally:
+        save_content(data)
+    
+    click.echo(f"\n=== Génération terminée ===")
+    click.echo(f"Posts créés: {len(generated_posts)}")
+
+
+def _generate_images(generated_posts: list[dict], data: dict) -> None:
+    """Génère les images des nouveaux posts et les passe en 'ready' dans data."""
     for post in generated_posts:
         try:
             click.echo(f"  Génération image pour {post['id']}...")
@@ -335,12 +367,6 @@ def generate_content(count: int, dry_run: bool):
             
         except Exception as e:
             click.echo(f"    Erreur génération image: {e}", err=True)
-    
-    # Sauvegarder les mises à jour
-    save_content(data)
-    
-    click.echo(f"\n=== Génération terminée ===")
-    click.echo(f"Posts créés: {len(generated_posts)}")
 
 
 # Catégories pour les phrases (cycle mois1 -> mois2 -> mois3)
@@ -373,15 +399,24 @@ def generate_phrases(from_num: int, to_num: int, dry_run: bool):
 
     click.echo(f"\n=== Génération des phrases {from_num} à {to_num} ===\n")
 
+    to_generate = []
     for num in range(from_num, to_num + 1):
         post_id = f"phrase_{num:03d}"
         if post_id in existing_ids:
             click.echo(f"  {post_id} existe déjà, ignoré.")
             continue
+        to_generate.append((num, post_id, PHRASE_CATEGORIES[(num - 1) % 3]))
+
+    # Toutes les phrases manquantes sont demandées à Claude en parallèle
+    results = claude_service.generate_concurrently(
+        [("phrase", category) for _, _, category in to_generate]
+    )
+
+    for (num, post_id, category), result in zip(to_generate, results):
         try:
             click.echo(f"  Génération {post_id}...")
-            category = PHRASE_CATEGORIES[(num - 1) % 3]
-            result = claude_service.generate_phrase(category=category)
+            if isinstance(result, Exception):
+                raise result
             new_post = {
                 "id": post_id,
                 "type": "phrase",
@@ -542,68 +577,62 @@ def grid_preview(rows: int):
     # Trier les posts publiés par publish_order
     posted.sort(key=lambda x: x.get("publish_order", 0), reverse=True)
     
-    click.echo("\n" + "=" * 60)
-    click.echo("           GRILLE INSTAGRAM - LE MIDDLE")
-    click.echo("=" * 60)
+    # Tout le rendu est accumulé puis écrit en une seule fois
+    out = []
+    out.append("\n" + "=" * 60)
+    out.append("           GRILLE INSTAGRAM - LE MIDDLE")
+    out.append("=" * 60)
     
     posted_count = get_posted_count()
     
-    click.echo(f"\nMode: aléatoire")
-    click.echo(f"Total publiés: {posted_count}")
+    out.append(f"\nMode: aléatoire")
+    out.append(f"Total publiés: {posted_count}")
     
     # Afficher la file d'attente (ordre aléatoire simulé)
-    click.echo("\n--- File d'attente (ordre aléatoire simulé) ---")
-    click.echo(f"{'Col 1':<20} {'Col 2':<20} {'Col 3':<20}")
-    click.echo("-" * 60)
+    out.append("\n--- File d'attente (ordre aléatoire simulé) ---")
+    out.append(f"{'Col 1':<20} {'Col 2':<20} {'Col 3':<20}")
+    out.append("-" * 60)
     
-    # Mélanger les posts ready et prendre les N premiers
-    queue = list(ready)
-    random.shuffle(queue)
-    queue = queue[: rows * 3]
-    # Compléter avec des placeholders si nécessaire
-    while len(queue) < rows * 3:
-        queue.append({"id": "[MANQUANT]", "status": "missing", "type": "?"})
+    # Tirer directement N posts ready au hasard, puis compléter avec des placeholders
+    slots = rows * 3
+    queue = random.sample(ready, min(slots, len(ready)))
+    queue += [{"id": "[MANQUANT]", "status": "missing", "type": "?"}] * (slots - len(queue))
+    
+    type_map = {"phrase": "P", "chiffre": "C", "photo": "Ph"}
+    
+    def format_cell(post):
+        post_id = post["id"][:14]
+        if post.get("status") == "ready":
+            return f"[{type_map.get(post.get('type', '?'), '?')}] {post_id}"
+        return f"[!] {post_id}"
     
     # Afficher en lignes de 3
-    for row in range(rows):
-        col1 = queue[row * 3] if row * 3 < len(queue) else None
-        col2 = queue[row * 3 + 1] if row * 3 + 1 < len(queue) else None
-        col3 = queue[row * 3 + 2] if row * 3 + 2 < len(queue) else None
-        
-        def format_cell(post):
-            if not post:
-                return " " * 18
-            post_id = post["id"][:14]
-            status = post.get("status", "?")
-            type_map = {"phrase": "P", "chiffre": "C", "photo": "Ph"}
-            type_indicator = type_map.get(post.get("type", "?"), "?")
-            if status == "ready":
-                return f"[{type_indicator}] {post_id}"
-            else:
-                return f"[!] {post_id}"
-        
-        click.echo(f"{format_cell(col1):<20} {format_cell(col2):<20} {format_cell(col3):<20}")
+    for start in range(0, slots, 3):
+        col1, col2, col3 = (format_cell(post) for post in queue[start : start + 3])
+        out.append(f"{col1:<20} {col2:<20} {col3:<20}")
     
-    click.echo("-" * 60)
-    click.echo("Légende: [P]=Phrase, [C]=Chiffre, [Ph]=Photo, [!]=Manquant")
+    out.append("-" * 60)
+    out.append("Légende: [P]=Phrase, [C]=Chiffre, [Ph]=Photo, [!]=Manquant")
     
     # Stats
-    click.echo(f"\n--- Statistiques ---")
-    click.echo(f"Posts 'ready':  {len(ready)} (P:{len([p for p in ready if p['type']=='phrase'])}, "
-               f"C:{len([p for p in ready if p['type']=='chiffre'])}, "
-               f"Ph:{len([p for p in ready if p['type']=='photo'])})")
-    click.echo(f"Posts 'draft':  {len(draft)}")
-    click.echo(f"Posts 'posted': {len(posted)}")
+    out.append(f"\n--- Statistiques ---")
+    out.append(f"Posts 'ready':  {len(ready)} (P:{len([p for p in ready if p['type']=='phrase'])}, "
+                f"C:{len([p for p in ready if p['type']=='chiffre'])}, "
+                f"Ph:{len([p for p in ready if p['type']=='photo'])})")
+    out.append(f"Posts 'draft':  {len(draft)}")
+    out.append(f"Posts 'posted': {len(posted)}")
     
     # Alertes
     if len(ready) < 6:
-        click.echo(f"\n[!] ALERTE: Moins de 6 posts prets! Generez du contenu.")
+        out.append(f"\n[!] ALERTE: Moins de 6 posts prets! Generez du contenu.")
     
     # Vérifier l'équilibre des types
     for type_name in PUBLISH_ORDER:
         type_ready = len([p for p in ready if p.get("type") == type_name])
         if type_ready < 2:
-            click.echo(f"[!] ALERTE: Seulement {type_ready} post(s) '{type_name}' ready!")
+            out.append(f"[!] ALERTE: Seulement {type_ready} post(s) '{type_name}' ready!")
+    
+    click.echo("\n".join(out))
 
 
 @cli.command()
@@ -615,25 +644,19 @@ def queue_status():
     
     click.echo("\n=== État de la file d'attente ===\n")
     
-    # Stats par type et statut
-    stats = {}
-    for post in posts:
-        post_type = post.get("type", "unknown")
-        status = post.get("status", "unknown")
-        
-        if post_type not in stats:
-            stats[post_type] = {"ready": 0, "draft": 0, "posted": 0}
-        
-        if status in stats[post_type]:
-            stats[post_type][status] += 1
+    # Stats par (type, statut) en une seule passe
+    stats = Counter((p.get("type", "unknown"), p.get("status", "unknown")) for p in posts)
+    types_present = {post_type for post_type, _ in stats}
     
     click.echo(f"{'Type':<12} {'Ready':<8} {'Draft':<8} {'Posted':<8}")
     click.echo("-" * 40)
     
     for post_type in PUBLISH_ORDER:
-        if post_type in stats:
-            s = stats[post_type]
-            click.echo(f"{post_type:<12} {s['ready']:<8} {s['draft']:<8} {s['posted']:<8}")
+        if post_type in types_present:
+            click.echo(
+                f"{post_type:<12} {stats[(post_type, 'ready')]:<8} "
+                f"{stats[(post_type, 'draft')]:<8} {stats[(post_type, 'posted')]:<8}"
+            )
     
     # Prochains posts
     click.echo(f"\n--- Mode de publication ---")
@@ -1,6 +1,6 @@
 from .instagram_service import InstagramService
 from .replicate_service import ReplicateService
 from .claude_service import ClaudeService
-from .unsplash_service import UnsplashService
+from .unsplash_service import AsyncUnsplashService, UnsplashService
 
-__all__ = ["InstagramService", "ReplicateService", "ClaudeService", "UnsplashService"]
+__all__ = ["InstagramService", "ReplicateService", "ClaudeService", "UnsplashService", "AsyncUnsplashService"]
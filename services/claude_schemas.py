@@ -0,0 +1,78 @@
+"""
+Schémas de sortie des générations Claude (validés avec Pydantic v2).
+Chaque schéma sert aussi d'input_schema à l'outil que Claude est forcé d'appeler,
+ce qui garantit une réponse JSON bien formée sans parsing du texte libre.
+"""
+from typing import ClassVar, Literal, Optional
+from pydantic import BaseModel, ConfigDict
+
+
+class Caption(BaseModel):
+    """Caption Instagram : texte principal et hashtags (sans #)."""
+
+    main: str
+    hashtags: list[str]
+
+
+class ChiffreCaption(Caption):
+    """Caption d'un post chiffre, avec un call-to-action optionnel."""
+
+    cta: Optional[str] = None
+
+
+class ChiffreContent(BaseModel):
+    """Contenu visuel d'un post chiffre."""
+
+    # Claude renvoie parfois le chiffre sous forme numérique
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+    context_text: str
+    number: str
+    unit_text: str
+
+
+class PhraseOutput(BaseModel):
+    """Phrase "La Galère" générée, avec sa caption et sa catégorie."""
+
+    tool_name: ClassVar[str] = "emit_phrase"
+
+    text: str
+    caption: Caption
+    category: Literal["mois1_injustices", "mois2_mythes", "mois3_redemption"]
+
+
+class ChiffreOutput(BaseModel):
+    """Post "Le Chiffre" généré, avec sa caption et sa catégorie."""
+
+    tool_name: ClassVar[str] = "emit_chiffre"
+
+    content: ChiffreContent
+    caption: ChiffreCaption
+    category: Literal[
+        "temps_trajet", "metro_rer", "cout_eloignement", "interactions_sociales", "statistiques"
+    ]
+
+
+class PhotoCaptionOutput(BaseModel):
+    """Caption d'un post photo ambiance."""
+
+    tool_name: ClassVar[str] = "emit_photo_caption"
+
+    caption: Caption
+
+
+def output_tool(schema: type[BaseModel]) -> dict:
+    """
+    Construit la définition d'outil Anthropic correspondant à un schéma de sortie.
+
+    Args:
+        schema: Classe de sortie (PhraseOutput, ChiffreOutput ou PhotoCaptionOutput)
+
+    Returns:
+        Dictionnaire {name, description, input_schema} pour le paramètre tools
+    """
+    return {
+        "name": schema.tool_name,
+        "description": f"Enregistre le contenu généré. {schema.__doc__}",
+        "input_schema": schema.model_json_schema(),
+    }
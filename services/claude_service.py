@@ -3,26 +3,104 @@ Service pour générer du contenu textuel avec Claude 3.5 Sonnet (Anthropic).
 Génère des phrases "La Galère" et des chiffres pour Le Middle.
 """
 import os
+import asyncio
+import copy
+import functools
+import hashlib
 import json
+import pickle
 import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from importlib.util import find_spec
 from pathlib import Path
 from typing import Optional
 from dotenv import load_dotenv
 
 load_dotenv()
 
-# Importer anthropic seulement si disponible
+# Décodeur stdlib pour extraire le premier objet JSON d'un texte (raw_decode)
+_DECODER = json.JSONDecoder()
+
+# orjson (optionnel) : parse/dump JSON plus rapides, repli sur la stdlib sinon
 try:
-    import anthropic
-    ANTHROPIC_AVAILABLE = True
+    import orjson
+
+    _loads = orjson.loads
+
+    def _dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2).decode()
 except ImportError:
-    ANTHROPIC_AVAILABLE = False
+    _loads = json.loads
+
+    def _dumps(obj) -> str:
+        return json.dumps(obj, indent=2, ensure_ascii=False)
+
+# anthropic (et httpx, pydantic) ne sont importés qu'à la création du premier client :
+# importer le module pour check_claude_availability() reste rapide
+ANTHROPIC_AVAILABLE = find_spec("anthropic") is not None
+anthropic = httpx = None
+
+# Sorties structurées validées par Pydantic (pydantic est une dépendance d'anthropic),
+# importées en même temps que le SDK
+STRUCTURED_OUTPUT_AVAILABLE = find_spec("pydantic") is not None
+ChiffreOutput = PhotoCaptionOutput = PhraseOutput = output_tool = None
+_SDK_LOCK = threading.Lock()
 
 
+def _ensure_sdk() -> None:
+    """Importe le SDK anthropic et les schémas de sortie au premier appel."""
+    global anthropic, httpx, ChiffreOutput, PhotoCaptionOutput, PhraseOutput, output_tool
+    with _SDK_LOCK:
+        if anthropic is not None:
+            return
+        import httpx as _httpx
+        if STRUCTURED_OUTPUT_AVAILABLE:
+            from services.claude_schemas import (
+                ChiffreOutput, PhotoCaptionOutput, PhraseOutput, output_tool,
+            )
+        import anthropic as _anthropic
+        httpx = _httpx
+        anthropic = _anthropic
+
 # Configuration
 ANTHROPIC_API_KEY = os.getenv("ANTHROPIC_API_KEY")
 MODEL = "claude-sonnet-4-20250514"
 
+# Transport HTTP partagé : HTTP/2 si le package h2 est installé, pool de connexions borné
+HTTP2_AVAILABLE = find_spec("h2") is not None
+# Client async : transport aiohttp (pip install "anthropic[aiohttp]"), plus rapide que httpx
+# quand beaucoup de requêtes tournent en parallèle ; repli sur httpx sinon
+AIOHTTP_AVAILABLE = find_spec("aiohttp") is not None
+HTTP_MAX_CONNECTIONS = 32
+HTTP_MAX_KEEPALIVE = 16
+HTTP_TIMEOUT = 60.0
+HTTP_CONNECT_TIMEOUT = 5.0
+# Délai maximum sans recevoir de chunk pendant un stream (timeout de lecture httpx) :
+# une réponse bloquée échoue au bout de ce délai au lieu d'attendre indéfiniment
+STREAM_IDLE_TIMEOUT = float(os.getenv("CLAUDE_STREAM_IDLE_TIMEOUT", "30"))
+
+# Plafonds de tokens générés par type de contenu. Les sorties réelles font ~150-300 tokens
+# (JSON de l'outil compris) : une marge est gardée car une réponse tronquée est invalide.
+PHRASE_MAX_TOKENS = 400
+CHIFFRE_MAX_TOKENS = 480
+PHOTO_CAPTION_MAX_TOKENS = 300
+
+# Cache disque des réponses (optionnel, pour le développement) : désactivé si la variable
+# n'est pas définie, car en production chaque génération doit produire un post inédit.
+RESPONSE_CACHE_DIR = os.getenv("CLAUDE_RESPONSE_CACHE_DIR")
+RESPONSE_CACHE_TTL = int(os.getenv("CLAUDE_RESPONSE_CACHE_TTL", "86400"))
+
+# Few-shot : K jeux d'exemples figés (graine fixe) utilisés à tour de rôle, pour que
+# le bloc d'exemples reste identique d'un appel à l'autre et profite du cache de préfixe
+FEWSHOT_BUCKETS = int(os.getenv("CLAUDE_FEWSHOT_BUCKETS", "8"))
+_FEWSHOT_SEED = 0
+
+# Cache disque (pickle) de l'index de content.json (optionnel) : un nouveau process
+# recharge l'index déjà construit au lieu de re-parser le JSON
+CONTENT_INDEX_CACHE = os.getenv("CLAUDE_INDEX_CACHE") == "1"
+
 # Prompt système pour la génération de contenu Le Middle
 SYSTEM_PROMPT = """Tu es un créateur de contenu pour Le Middle, une application web parisienne qui aide les groupes d'amis (2 à 6 personnes) à trouver un lieu de rendez-vous équidistant en temps de trajet via les transports en commun.
 
@@ -99,9 +177,500 @@ GUIDE DE STYLE POUR LES PHRASES:
 - Le lecteur doit se dire "C'est EXACTEMENT ça" ou rire en reconnaissant la situation
 """
 
+# Gabarits de prompts, construits une seule fois à l'import. Les parties fixes sont des
+# constantes (identiques octet pour octet d'un appel à l'autre, donc cachables) ; les
+# parties variables sont remplies avec str.format_map.
+_PHRASE_INSTRUCTIONS = """Génère UNE SEULE nouvelle phrase pour la série "La Galère" de Le Middle.
+
+FORMAT ATTENDU:
+- Une phrase PUNCHLINE de 1-2 lignes, 3 max si nécessaire
+- Ironique, mordante, ou qui retourne une situation absurde
+- Le lecteur doit immédiatement se reconnaître ET sourire/rire
+- Privilégier les reformulations, traductions, détournements plutôt que les descriptions plates
+- JAMAIS de narration robotique type "X fait Y min, toi Z min"
+
+Réponds UNIQUEMENT avec un JSON valide au format suivant (sans markdown, sans backticks):
+{
+    "text": "La phrase générée ici",
+    "caption": {
+        "main": "Le texte de caption Instagram (2-3 phrases max, peut inclure un emoji)",
+        "hashtags": ["lemiddle", "hashtag2", "hashtag3", "hashtag4", "hashtag5"]
+    },
+    "category": "mois1_injustices ou mois2_mythes ou mois3_redemption"
+}"""
+
+# Consignes spécifiques par catégorie de phrase (chaîne vide si aucune catégorie imposée)
+_PHRASE_CATEGORY_GUIDANCE = {
+    "mois1_injustices": """Catégorie: INJUSTICES DU QUOTIDIEN
+- Observation ironique d'une situation injuste dans les transports parisiens
+- Utilise le détournement rhétorique, la question rhétorique, ou la reformulation sarcastique
+- Le lecteur doit ressentir l'injustice ET en rire
+- Structures efficaces: "Dire X, c'est en fait Y", "'Citation' : La phrase préférée de celui qui...", "Drôle de conception de X quand..."
+- Exemples de ton: "Dire 'C'est plus simple chez moi', c'est juste déclarer officiellement la guerre à ceux qui n'habitent pas la même ligne."
+""",
+    "mois2_mythes": """Catégorie: MYTHES ET LÉGENDES URBAINES
+- Décoder les mensonges classiques et comportements typiques des parisiens dans les transports
+- Utilise la "Traduction de...", la reformulation absurde, les statistiques inventées hilarantes
+- Structures efficaces: "Traduction de 'X' : Y", "'X' = Y (la vraie version)", "Le record du monde de..."
+- Exemples de ton: "Traduction de 'Je suis dans le métro' : Je suis sur le quai, il y a un colis suspect et je serai là dans 40 minutes."
+- Prendre en compte les vrais problèmes récurrents (colis suspects, retards, pannes) pour ancrer dans la réalité
+""",
+    "mois3_redemption": """Catégorie: RÉDEMPTION (Le Middle comme solution)
+- Le Middle est présenté comme une SOLUTION POSITIVE, une récompense, jamais comme une galère partagée
+- L'effort est partagé équitablement ET mène à un moment agréable (la pinte, la soirée, retrouver ses amis)
+- INTERDIT: framing négatif ("tout le monde galère autant"), Le Middle ne doit JAMAIS être associé à la douleur
+- Structures efficaces: "Le Middle : Parce que...", "Pour une fois, c'est toi qui...", "La fin de X. Le début de Y."
+- Exemples de ton: "Le Middle : La fin du favoritisme géographique. Ici, on partage l'effort (et la pinte)."
+""",
+}
+
+_PHRASE_EXAMPLES_TMPL = """EXEMPLES DE PHRASES BIEN NOTÉES (à utiliser comme inspiration stylistique, NE PAS COPIER):
+{examples_text}"""
+
+_PHRASE_DETAILS_TMPL = """{category_guidance}
+
+EXEMPLES À NE PAS REPRODUIRE (et leur version corrigée):
+{bad_examples_text}"""
+
+# Catégories de chiffres (tuple ordonné pour le prompt, frozenset pour la validation)
+_CHIFFRE_CATEGORIES = (
+    "temps_trajet", "metro_rer", "cout_eloignement", "interactions_sociales", "statistiques",
+)
+_VALID_CHIFFRE_CATEGORIES = frozenset(_CHIFFRE_CATEGORIES)
+_CHIFFRE_ANY_CATEGORY_GUIDANCE = f"Choisis une catégorie parmi: {', '.join(_CHIFFRE_CATEGORIES)}"
+
+_CHIFFRE_INSTRUCTIONS = """Génère UN SEUL nouveau chiffre pour la série "Le Chiffre" de Le Middle.
+
+FORMAT ATTENDU:
+- Un chiffre central (peut être 01, 02, ... 99, 100, etc.)
+- Un texte de contexte en haut (la mise en situation)
+- Un texte d'unité en bas (l'unité avec une pointe d'humour)
+- Le chiffre peut être réel ou légèrement absurde
+
+Réponds UNIQUEMENT avec un JSON valide au format suivant (sans markdown, sans backticks):
+{
+    "content": {
+        "context_text": "Le texte de contexte en haut",
+        "number": "42",
+        "unit_text": "l'unité avec commentaire sarcastique"
+    },
+    "caption": {
+        "main": "Le texte de caption Instagram (2-3 phrases, développe l'idée)",
+        "hashtags": ["lemiddle", "hashtag2", "hashtag3", "hashtag4", "hashtag5"],
+        "cta": "Un call-to-action (ex: Retrouvez-vous simplement. / On se capte au Middle.)"
+    },
+    "category": "la_categorie_choisie"
+}"""
+
+_CHIFFRE_EXAMPLES_TMPL = """EXEMPLES DE CHIFFRES EXISTANTS (à utiliser comme inspiration, NE PAS COPIER):
+{examples_text}"""
+
+# Consigne finale ajoutée après un prompt phrase/chiffre pour en générer plusieurs d'un coup
+_BATCH_TMPL = """CONSIGNE FINALE : au lieu d'un seul élément, génère EXACTEMENT {n} éléments distincts
+(thèmes et structures variés), chacun au format JSON décrit plus haut.
+Réponds UNIQUEMENT avec un JSON valide de la forme (sans markdown, sans backticks):
+{{"items": [ ...{n} objets... ]}}"""
+
+_PHOTO_CAPTION_TMPL = """Génère une caption Instagram pour un post photo "ambiance" de Le Middle.
+
+CONTEXTE DE LA PHOTO:
+{context_text}
+
+L'objectif est de montrer la "récompense" - le moment passé ensemble après avoir trouvé le bon lieu de rendez-vous.
+
+Réponds UNIQUEMENT avec un JSON valide au format suivant (sans markdown, sans backticks):
+{{
+    "caption": {{
+        "main": "Le texte de caption (2-3 lignes, évoque le moment partagé, peut inclure un emoji)",
+        "hashtags": ["lemiddle", "paris", "hashtag3", "hashtag4", "hashtag5"]
+    }}
+}}"""
+
+
+# Le prompt système est identique à chaque appel : on le marque comme préfixe à mettre en cache
+_SYSTEM_BLOCKS = [
+    {"type": "text", "text": SYSTEM_PROMPT, "cache_control": {"type": "ephemeral"}},
+]
+
+# Pour les phrases, le guide de style rejoint le prompt système dans le préfixe caché
+_PHRASE_SYSTEM_BLOCKS = [
+    {"type": "text", "text": SYSTEM_PROMPT},
+    {"type": "text", "text": PHRASE_STYLE_GUIDE, "cache_control": {"type": "ephemeral"}},
+]
+
+
+def _text_block(text: str, cache: bool = False) -> dict:
+    """
+    Construit un bloc de contenu texte pour l'API Messages.
+    
+    Args:
+        text: Contenu du bloc
+        cache: Si True, marque la fin du préfixe réutilisable (cache_control éphémère)
+        
+    Returns:
+        Bloc au format {"type": "text", ...}
+    """
+    block = {"type": "text", "text": text}
+    if cache:
+        block["cache_control"] = {"type": "ephemeral"}
+    return block
+
+
+# Cache mémoire des réponses (par process), utilisé seulement sur demande (use_cache=True)
+_MEMORY_CACHE: dict[str, tuple[float, dict]] = {}
+
+
+def _request_key(model: str, max_tokens: int, system: list[dict], prompt, schema=None) -> str:
+    """
+    Clé de cache d'une requête : sha256 du modèle, de max_tokens, des blocs système,
+    du prompt (exemples few-shot inclus) et de l'outil de sortie éventuel.
+    """
+    tool_name = schema.tool_name if schema is not None else None
+    payload = json.dumps(
+        [model, max_tokens, system, prompt, tool_name], sort_keys=True, ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _response_cache_get(key: Optional[str], use_memory: bool = False) -> Optional[dict]:
+    """
+    Lit une réponse en cache (mémoire si demandé, puis disque si configuré)
+    si elle existe et n'a pas expiré.
+    """
+    if key is None:
+        return None
+    if use_memory:
+        entry = _MEMORY_CACHE.get(key)
+        if entry is not None and time.monotonic() - entry[0] < RESPONSE_CACHE_TTL:
+            return copy.deepcopy(entry[1])
+    if not RESPONSE_CACHE_DIR:
+        return None
+    path = Path(RESPONSE_CACHE_DIR) / f"{key}.json"
+    try:
+        if time.time() - path.stat().st_mtime > RESPONSE_CACHE_TTL:
+            return None
+        return _loads(path.read_bytes())
+    except (OSError, ValueError):
+        return None
+
+
+def _response_cache_set(key: Optional[str], result: dict, use_memory: bool = False) -> None:
+    """Enregistre une réponse en mémoire si demandé, et sur disque si configuré (écriture atomique)."""
+    if key is None:
+        return
+    if use_memory:
+        _MEMORY_CACHE[key] = (time.monotonic(), copy.deepcopy(result))
+    if not RESPONSE_CACHE_DIR:
+        return
+    path = Path(RESPONSE_CACHE_DIR) / f"{key}.json"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+    tmp_path.write_text(json.dumps(result, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp_path, path)
+
+
+# Client Anthropic unique pour tout le process (réutilise les connexions TLS)
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def _http_client_options() -> dict:
+    """Options communes aux transports httpx sync et async."""
+    return {
+        "http2": HTTP2_AVAILABLE,
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        ),
+        "timeout": httpx.Timeout(HTTP_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT, read=STREAM_IDLE_TIMEOUT),
+    }
+
+
+def _async_http_client():
+    """Transport HTTP du client async : aiohttp si disponible, sinon httpx."""
+    options = _http_client_options()
+    if AIOHTTP_AVAILABLE and hasattr(anthropic, "DefaultAioHttpClient"):
+        # aiohttp ne parle que HTTP/1.1
+        options.pop("http2")
+        return anthropic.DefaultAioHttpClient(**options)
+    return anthropic.DefaultAsyncHttpxClient(**options)
+
+
+def _get_client() -> "anthropic.Anthropic":
+    """Retourne le client Anthropic partagé, créé au premier appel."""
+    global _CLIENT
+    _ensure_sdk()
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = anthropic.Anthropic(
+                api_key=ANTHROPIC_API_KEY,
+                http_client=anthropic.DefaultHttpxClient(**_http_client_options()),
+            )
+        return _CLIENT
+
+
+# Fichier des posts existants (source des exemples few-shot), résolu une seule fois
+_CONTENT_PATH = Path(__file__).resolve().parent.parent / "data" / "content.json"
+
+# Cache de content.json, indexé une fois par version du fichier (invalidé sur le mtime).
+# "buckets" contient les jeux d'exemples few-shot dérivés et "texts" leur version formatée
+# pour le prompt ; les deux sont recalculés au rechargement.
+_CONTENT_CACHE = {"mtime": None, "index": {}, "buckets": {}, "texts": {}}
+_CONTENT_LOCK = threading.Lock()
+
+
+def _index_posts(posts: list[dict]) -> dict:
+    """
+    Indexe les posts pour la sélection des exemples few-shot.
+    
+    Args:
+        posts: Liste des posts de content.json
+        
+    Returns:
+        Dictionnaire d'index :
+        - "by_rating": {(type, rating): posts}
+        - "corrected": {type: posts corrigés (avec original_text), pires originaux d'abord}
+        - "corrected_by_rating": {(type, original_rating): posts corrigés}
+    """
+    by_rating = {}
+    corrected = {}
+    corrected_by_rating = {}
+    for post in posts:
+        post_type = post.get("type")
+        by_rating.setdefault((post_type, post.get("rating")), []).append(post)
+        if post.get("original_text"):
+            corrected.setdefault(post_type, []).append(post)
+            corrected_by_rating.setdefault((post_type, post.get("original_rating")), []).append(post)
+    
+    for group in corrected.values():
+        group.sort(key=lambda p: p.get("original_rating", 2))
+    
+    return {"by_rating": by_rating, "corrected": corrected, "corrected_by_rating": corrected_by_rating}
+
+
+def _read_content_index(content_path: Path, mtime: float) -> dict:
+    """
+    Lit et indexe content.json. Si CLAUDE_INDEX_CACHE=1, l'index est aussi conservé
+    dans un pickle à côté du fichier, réutilisé tant que le mtime source n'a pas changé.
+    
+    Args:
+        content_path: Chemin vers content.json
+        mtime: mtime actuel de content.json
+        
+    Returns:
+        Dictionnaire d'index des posts (voir _index_posts)
+    """
+    cache_path = content_path.with_name(content_path.name + ".cache.pkl")
+    if CONTENT_INDEX_CACHE:
+        try:
+            with open(cache_path, "rb") as f:
+                cached = pickle.load(f)
+            if cached.get("mtime") == mtime:
+                return cached["index"]
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError, TypeError):
+            pass
+    
+    # orjson (comme json.loads) accepte directement les octets UTF-8 : pas de décodage intermédiaire
+    data = _loads(content_path.read_bytes())
+    index = _index_posts(data.get("posts", []))
+    
+    if CONTENT_INDEX_CACHE:
+        tmp_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                pickle.dump({"mtime": mtime, "index": index}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            tmp_path.unlink(missing_ok=True)
+    return index
+
+
+def _load_content_index(content_path: Path) -> dict:
+    """
+    Charge et indexe content.json (voir _index_posts).
+    Le fichier n'est relu et re-parsé que si son mtime a changé depuis le dernier appel.
+    
+    Args:
+        content_path: Chemin vers content.json
+        
+    Returns:
+        Dictionnaire d'index des posts
+    """
+    mtime = content_path.stat().st_mtime
+    with _CONTENT_LOCK:
+        if _CONTENT_CACHE["mtime"] != mtime:
+            _CONTENT_CACHE["mtime"] = mtime
+            _CONTENT_CACHE["index"] = _read_content_index(content_path, mtime)
+            _CONTENT_CACHE["buckets"] = {}
+            _CONTENT_CACHE["texts"] = {}
+        return _CONTENT_CACHE["index"]
+
+
+def _sample_tiers(tiers, count: int, rng) -> list[dict]:
+    """
+    Tire jusqu'à count éléments en épuisant les tiers dans l'ordre de priorité,
+    dans un ordre aléatoire au sein de chaque tier (random.sample : O(k), sans mélanger tout le tier).
+    
+    Args:
+        tiers: Listes de posts, de la plus prioritaire à la moins prioritaire
+        count: Nombre d'éléments à tirer
+        rng: Générateur aléatoire (module random ou instance random.Random)
+        
+    Returns:
+        Liste d'au plus count posts
+    """
+    selected = []
+    for tier in tiers:
+        need = count - len(selected)
+        if need <= 0:
+            break
+        selected.extend(rng.sample(tier, min(need, len(tier))))
+    return selected
+
+
+def _build_example_buckets(by_rating: dict, post_type: str, count: int) -> list[list[dict]]:
+    """
+    Construit FEWSHOT_BUCKETS jeux d'exemples à partir d'une graine fixe.
+    Chaque jeu privilégie les posts bien notés (rating 3), puis 2, puis non notés,
+    et exclut les rating 1.
+    
+    Args:
+        by_rating: Index {(type, rating): posts}
+        post_type: Type de post ('phrase' ou 'chiffre')
+        count: Nombre d'exemples par jeu
+        
+    Returns:
+        Liste de jeux d'exemples
+    """
+    # Tiers par rating : les posts notés 1 (mauvais) sont exclus
+    rated_3 = by_rating.get((post_type, 3), [])
+    rated_2 = by_rating.get((post_type, 2), [])
+    unrated = by_rating.get((post_type, None), [])
+    
+    rng = random.Random(_FEWSHOT_SEED)
+    buckets = []
+    for _ in range(max(FEWSHOT_BUCKETS, 1)):
+        buckets.append(_sample_tiers((rated_3, rated_2, unrated), count, rng))
+    return buckets
+
+
+def _sample_corrected(index: dict, post_type: str, count: int, rng) -> list[dict]:
+    """
+    Tire count paires BAD->GOOD parmi les posts corrigés, pires originaux (rating 1) d'abord.
+    
+    Args:
+        index: Index des posts (voir _index_posts)
+        post_type: Type de post ('phrase' ou 'chiffre')
+        count: Nombre de paires
+        rng: Générateur aléatoire (module random ou instance random.Random)
+        
+    Returns:
+        Liste de posts corrigés
+    """
+    # Posts corrigés (ceux qui ont un original_text), pires originaux (rating 1) d'abord
+    worst_first = index["corrected"].get(post_type, [])
+    if len(worst_first) <= count:
+        return worst_first
+    
+    # Prendre les count pires, avec un peu d'aléatoire parmi les ex-aequo
+    rating_1 = index["corrected_by_rating"].get((post_type, 1), [])
+    rating_2 = index["corrected_by_rating"].get((post_type, 2), [])
+    return _sample_tiers((rating_1, rating_2), count, rng)
+
+
+def _build_corrected_buckets(index: dict, post_type: str, count: int) -> list[list[dict]]:
+    """
+    Construit les jeux de paires BAD->GOOD (graine fixe), pires originaux (rating 1) d'abord.
+    
+    Args:
+        index: Index des posts (voir _index_posts)
+        post_type: Type de post ('phrase' ou 'chiffre')
+        count: Nombre de paires par jeu
+        
+    Returns:
+        Liste de jeux de posts corrigés
+    """
+    worst_first = index["corrected"].get(post_type, [])
+    if len(worst_first) <= count:
+        return [worst_first]
+    
+    rng = random.Random(_FEWSHOT_SEED)
+    return [_sample_corrected(index, post_type, count, rng) for _ in range(max(FEWSHOT_BUCKETS, 1))]
+
+
+def _get_example_buckets(
+    content_path: Path,
+    post_type: str,
+    good_count: int,
+    bad_count: int,
+) -> tuple[list[list[dict]], list[list[dict]]]:
+    """
+    Retourne les jeux d'exemples few-shot d'un type, calculés une fois par version de content.json.
+    Exemples bien notés et paires BAD->GOOD sont tirés du même index, en un seul passage.
+    
+    Args:
+        content_path: Chemin vers content.json
+        post_type: Type de post ('phrase' ou 'chiffre')
+        good_count: Nombre d'exemples bien notés par jeu (0 pour ne pas en charger)
+        bad_count: Nombre de paires BAD->GOOD par jeu (0 pour ne pas en charger)
+        
+    Returns:
+        Tuple (jeux d'exemples bien notés, jeux de paires BAD->GOOD)
+    """
+    index = _load_content_index(content_path)
+    with _CONTENT_LOCK:
+        buckets = _CONTENT_CACHE["buckets"]
+        good_key = (post_type, good_count, False)
+        bad_key = (post_type, bad_count, True)
+        if good_count and good_key not in buckets:
+            buckets[good_key] = _build_example_buckets(index["by_rating"], post_type, good_count)
+        if bad_count and bad_key not in buckets:
+            buckets[bad_key] = _build_corrected_buckets(index, post_type, bad_count)
+        return buckets.get(good_key, [[]]), buckets.get(bad_key, [[]])
+
+
+def _format_examples_cached(examples: list[dict], formatter) -> str:
+    """
+    Formate un jeu d'exemples en ne calculant le texte qu'une fois par jeu.
+    Le cache est vidé à chaque rechargement de content.json.
+    
+    Args:
+        examples: Jeu d'exemples (tel que retourné par _get_example_buckets)
+        formatter: Méthode de formatage (_format_phrase_examples ou _format_chiffre_examples)
+        
+    Returns:
+        Texte des exemples pour le prompt
+    """
+    if not examples:
+        return formatter(examples)
+    with _CONTENT_LOCK:
+        texts = _CONTENT_CACHE["texts"]
+        key = (formatter.__name__, id(examples))
+        entry = texts.get(key)
+    # Le jeu est conservé avec son texte : un id réutilisé ne peut pas renvoyer un texte périmé
+    if entry is not None and entry[0] is examples:
+        return entry[1]
+    text = formatter(examples)
+    with _CONTENT_LOCK:
+        texts[key] = (examples, text)
+    return text
+
 
 class ClaudeService:
-    """Service pour générer du contenu avec Claude 3.5 Sonnet."""
+    """
+    Service pour générer du contenu avec Claude 3.5 Sonnet.
+    
+    Une même instance peut être partagée entre threads. Les générations indépendantes
+    gagnent à être lancées en parallèle (durée ≈ la plus lente au lieu de la somme) :
+    
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            fut_phrase = executor.submit(service.generate_phrase)
+            fut_chiffre = executor.submit(service.generate_chiffre)
+            phrase, chiffre = fut_phrase.result(), fut_chiffre.result()
+    """
+
+    # Générations simultanées au plus dans generate_concurrently (évite les rafales de 429)
+    MAX_CONCURRENCY = 8
 
     def __init__(self):
         """Initialise le service Claude."""
@@ -111,56 +680,67 @@ class ClaudeService:
         if not ANTHROPIC_API_KEY:
             raise ValueError("ANTHROPIC_API_KEY n'est pas configuré dans .env")
         
-        self.client = anthropic.Anthropic(api_key=ANTHROPIC_API_KEY)
+        self.client = _get_client()
+        self._async_client = None
+        self._bucket_index = {}
+        self._bucket_lock = threading.Lock()
         self.model = MODEL
 
-    def _load_examples(self, post_type: str, count: int = 5) -> list[dict]:
+    def _load_example_bundle(
+        self,
+        post_type: str,
+        good_count: int = 5,
+        bad_count: int = 3,
+        use_cache: bool = False,
+    ) -> tuple[list[dict], list[dict]]:
         """
-        Charge des exemples de posts existants pour le few-shot learning.
-        Privilégie les posts bien notés (rating 3), puis 2, et exclut les rating 1.
+        Charge en un seul appel les exemples few-shot et les paires BAD->GOOD d'un type.
+        Les exemples privilégient les posts bien notés (rating 3, puis 2) et excluent les rating 1 ;
+        les paires proviennent des posts corrigés, les pires (original_rating 1) en premier.
+        Les exemples proviennent de jeux figés utilisés à tour de rôle (voir FEWSHOT_BUCKETS).
+        Les paires sont tirées au hasard à chaque appel, sauf avec use_cache : elles suivent
+        alors la même rotation, pour qu'un même prompt se répète et que le cache serve.
         
         Args:
             post_type: Type de post ('phrase' ou 'chiffre')
-            count: Nombre d'exemples à charger
+            good_count: Nombre d'exemples à charger (0 pour aucun)
+            bad_count: Nombre de paires à charger (0 pour aucune)
+            use_cache: Si True, paires tirées des jeux figés (voir generate_phrase)
             
         Returns:
-            Liste d'exemples de posts
+            Tuple (exemples de posts, posts ayant un original_text)
         """
-        content_path = Path(__file__).parent.parent / "data" / "content.json"
-        
-        if not content_path.exists():
-            return []
-        
-        with open(content_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        posts = [p for p in data.get("posts", []) if p.get("type") == post_type]
-        
-        # Séparer par rating : exclure les posts notés 1 (mauvais)
-        rated_3 = [p for p in posts if p.get("rating") == 3]
-        rated_2 = [p for p in posts if p.get("rating") == 2]
-        unrated = [p for p in posts if p.get("rating") is None]
-        # rating == 1 : exclus des exemples
+        if not _CONTENT_PATH.exists():
+            return [], []
         
-        # Construire la liste de candidats en priorisant les meilleurs
-        candidates = []
-        
-        # D'abord les phrases notées 3
-        if rated_3:
-            random.shuffle(rated_3)
-            candidates.extend(rated_3)
-        
-        # Puis les phrases notées 2
-        if rated_2:
-            random.shuffle(rated_2)
-            candidates.extend(rated_2)
-        
-        # Puis les phrases non notées (anciennes, probablement OK)
-        if unrated:
-            random.shuffle(unrated)
-            candidates.extend(unrated)
-        
-        return candidates[:count]
+        good_buckets, bad_buckets = _get_example_buckets(
+            _CONTENT_PATH, post_type, good_count, bad_count if use_cache else 0
+        )
+        good = good_buckets[self._next_bucket_index(post_type, len(good_buckets))] if good_count else []
+        if not bad_count:
+            bad = []
+        elif use_cache:
+            bad = bad_buckets[self._next_bucket_index(f"{post_type}_corrected", len(bad_buckets))]
+        else:
+            bad = _sample_corrected(_load_content_index(_CONTENT_PATH), post_type, bad_count, random)
+        return good, bad
+
+    def _load_examples(self, post_type: str, count: int = 5) -> list[dict]:
+        """Charge des exemples de posts existants pour le few-shot learning (voir _load_example_bundle)."""
+        return self._load_example_bundle(post_type, good_count=count, bad_count=0)[0]
+
+    def _next_bucket_index(self, post_type: str, bucket_count: int) -> int:
+        """
+        Retourne l'indice du prochain jeu d'exemples à utiliser pour ce type (rotation).
+        La rotation démarre à un jeu tiré au hasard : un process qui ne génère que quelques
+        posts (ex. generate-content en CI) ne retombe pas à chaque fois sur les premiers jeux.
+        """
+        with self._bucket_lock:
+            index = self._bucket_index.get(post_type)
+            if index is None:
+                index = random.randrange(bucket_count)
+            self._bucket_index[post_type] = index + 1
+        return index % bucket_count
 
     def _format_phrase_examples(self, examples: list[dict]) -> str:
         """Formate les exemples de phrases pour le prompt."""
@@ -176,44 +756,8 @@ class ClaudeService:
         return "\n\n".join(formatted)
 
     def _load_bad_examples(self, post_type: str, count: int = 3) -> list[dict]:
-        """
-        Charge des paires BAD->GOOD depuis les posts corrigés (original_text + text actuel).
-        Sélectionne des posts qui ont un original_text et un original_rating de 1 (les pires).
-        
-        Args:
-            post_type: Type de post ('phrase' ou 'chiffre')
-            count: Nombre de paires à charger
-            
-        Returns:
-            Liste de posts ayant un original_text (paire bad->good)
-        """
-        content_path = Path(__file__).parent.parent / "data" / "content.json"
-        
-        if not content_path.exists():
-            return []
-        
-        with open(content_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        
-        # Chercher les posts corrigés (ceux qui ont un original_text)
-        corrected = [
-            p for p in data.get("posts", [])
-            if p.get("type") == post_type and p.get("original_text")
-        ]
-        
-        # Prioriser les pires originaux (rating 1)
-        worst_first = sorted(corrected, key=lambda p: p.get("original_rating", 2))
-        
-        if len(worst_first) > count:
-            # Prendre les count pires, avec un peu d'aléatoire parmi les ex-aequo
-            rating_1 = [p for p in worst_first if p.get("original_rating") == 1]
-            rating_2 = [p for p in worst_first if p.get("original_rating") == 2]
-            random.shuffle(rating_1)
-            random.shuffle(rating_2)
-            pool = rating_1 + rating_2
-            return pool[:count]
-        
-        return worst_first[:count]
+        """Charge des paires BAD->GOOD depuis les posts corrigés (voir _load_example_bundle)."""
+        return self._load_example_bundle(post_type, good_count=0, bad_count=count)[1]
 
     def _format_bad_examples(self, bad_examples: list[dict]) -> str:
         """Formate les paires BAD->GOOD pour le prompt."""
@@ -246,239 +790,505 @@ class ClaudeService:
         
         return "\n\n".join(formatted)
 
-    def generate_phrase(self, category: Optional[str] = None) -> dict:
+    @property
+    def async_client(self) -> "anthropic.AsyncAnthropic":
         """
-        Génère une nouvelle phrase "La Galère".
+        Client asynchrone, créé à la première utilisation.
+        Contrairement au client sync, il n'est pas partagé au niveau du process :
+        son pool de connexions est lié à la boucle asyncio courante.
+        """
+        if self._async_client is None:
+            self._async_client = anthropic.AsyncAnthropic(
+                api_key=ANTHROPIC_API_KEY,
+                max_retries=2,
+                http_client=_async_http_client(),
+            )
+        return self._async_client
+
+    def _request_params(
+        self,
+        prompt: str | list[dict],
+        max_tokens: int,
+        schema=None,
+        system: Optional[list[dict]] = None,
+    ) -> dict:
+        """
+        Construit les paramètres d'une requête à l'API Messages (stream ou batch).
         
         Args:
-            category: Catégorie optionnelle (mois1_injustices, mois2_mythes, mois3_redemption)
+            prompt: Texte du prompt, ou liste de blocs de contenu (voir _text_block)
+            max_tokens: Nombre maximum de tokens générés
+            schema: Schéma de sortie optionnel ; Claude est alors forcé d'appeler l'outil associé
+            system: Blocs du prompt système (par défaut _SYSTEM_BLOCKS)
             
         Returns:
-            Dictionnaire avec le contenu généré
+            Dictionnaire de paramètres
         """
-        examples = self._load_examples("phrase", count=5)
-        examples_text = self._format_phrase_examples(examples)
-        bad_examples = self._load_bad_examples("phrase", count=3)
-        bad_examples_text = self._format_bad_examples(bad_examples)
-        
-        category_guidance = ""
-        if category == "mois1_injustices":
-            category_guidance = """Catégorie: INJUSTICES DU QUOTIDIEN
-- Observation ironique d'une situation injuste dans les transports parisiens
-- Utilise le détournement rhétorique, la question rhétorique, ou la reformulation sarcastique
-- Le lecteur doit ressentir l'injustice ET en rire
-- Structures efficaces: "Dire X, c'est en fait Y", "'Citation' : La phrase préférée de celui qui...", "Drôle de conception de X quand..."
-- Exemples de ton: "Dire 'C'est plus simple chez moi', c'est juste déclarer officiellement la guerre à ceux qui n'habitent pas la même ligne."
-"""
-        elif category == "mois2_mythes":
-            category_guidance = """Catégorie: MYTHES ET LÉGENDES URBAINES
-- Décoder les mensonges classiques et comportements typiques des parisiens dans les transports
-- Utilise la "Traduction de...", la reformulation absurde, les statistiques inventées hilarantes
-- Structures efficaces: "Traduction de 'X' : Y", "'X' = Y (la vraie version)", "Le record du monde de..."
-- Exemples de ton: "Traduction de 'Je suis dans le métro' : Je suis sur le quai, il y a un colis suspect et je serai là dans 40 minutes."
-- Prendre en compte les vrais problèmes récurrents (colis suspects, retards, pannes) pour ancrer dans la réalité
-"""
-        elif category == "mois3_redemption":
-            category_guidance = """Catégorie: RÉDEMPTION (Le Middle comme solution)
-- Le Middle est présenté comme une SOLUTION POSITIVE, une récompense, jamais comme une galère partagée
-- L'effort est partagé équitablement ET mène à un moment agréable (la pinte, la soirée, retrouver ses amis)
-- INTERDIT: framing négatif ("tout le monde galère autant"), Le Middle ne doit JAMAIS être associé à la douleur
-- Structures efficaces: "Le Middle : Parce que...", "Pour une fois, c'est toi qui...", "La fin de X. Le début de Y."
-- Exemples de ton: "Le Middle : La fin du favoritisme géographique. Ici, on partage l'effort (et la pinte)."
-"""
+        kwargs = {
+            "model": self.model,
+            "max_tokens": max_tokens,
+            "system": system or _SYSTEM_BLOCKS,
+            "messages": [
+                {"role": "user", "content": prompt}
+            ],
+        }
+        if schema is not None:
+            tool = _output_tool(schema)
+            kwargs["tools"] = [tool]
+            kwargs["tool_choice"] = {"type": "tool", "name": tool["name"]}
+        return kwargs
+
+    def _complete(self, prompt: str | list[dict], max_tokens: int, system: Optional[list[dict]] = None) -> str:
+        """
+        Envoie le prompt à Claude et retourne le texte de la réponse.
+        La réponse est lue en streaming : les tokens arrivent au fil de la génération
+        au lieu d'un seul corps HTTP à la fin.
         
-        prompt = f"""Génère UNE SEULE nouvelle phrase pour la série "La Galère" de Le Middle.
+        Args:
+            prompt: Texte du prompt, ou liste de blocs de contenu (voir _text_block)
+            max_tokens: Nombre maximum de tokens générés
+            system: Blocs du prompt système (par défaut _SYSTEM_BLOCKS)
+        """
+        with self.client.messages.stream(
+            **self._request_params(prompt, max_tokens, system=system)
+        ) as stream:
+            return "".join(stream.text_stream)
 
-{PHRASE_STYLE_GUIDE}
+    async def _acomplete(
+        self, prompt: str | list[dict], max_tokens: int, system: Optional[list[dict]] = None
+    ) -> str:
+        """Version asynchrone de _complete."""
+        async with self.async_client.messages.stream(
+            **self._request_params(prompt, max_tokens, system=system)
+        ) as stream:
+            return "".join([text async for text in stream.text_stream])
 
-FORMAT ATTENDU:
-- Une phrase PUNCHLINE de 1-2 lignes, 3 max si nécessaire
-- Ironique, mordante, ou qui retourne une situation absurde
-- Le lecteur doit immédiatement se reconnaître ET sourire/rire
-- Privilégier les reformulations, traductions, détournements plutôt que les descriptions plates
-- JAMAIS de narration robotique type "X fait Y min, toi Z min"
-
-{category_guidance}
+    def _complete_structured(
+        self, prompt: str | list[dict], max_tokens: int, schema, system: Optional[list[dict]] = None
+    ) -> dict:
+        """
+        Envoie le prompt à Claude en imposant l'outil de sortie du schéma,
+        et retourne l'entrée de l'outil validée par Pydantic.
+        """
+        with self.client.messages.stream(
+            **self._request_params(prompt, max_tokens, schema, system)
+        ) as stream:
+            message = stream.get_final_message()
+        return _tool_output(message, schema)
 
-EXEMPLES À NE PAS REPRODUIRE (et leur version corrigée):
-{bad_examples_text if bad_examples_text else "Pas de mauvais exemples disponibles."}
+    async def _acomplete_structured(
+        self, prompt: str | list[dict], max_tokens: int, schema, system: Optional[list[dict]] = None
+    ) -> dict:
+        """Version asynchrone de _complete_structured."""
+        async with self.async_client.messages.stream(
+            **self._request_params(prompt, max_tokens, schema, system)
+        ) as stream:
+            message = await stream.get_final_message()
+        return _tool_output(message, schema)
 
-EXEMPLES DE PHRASES BIEN NOTÉES (à utiliser comme inspiration stylistique, NE PAS COPIER):
-{examples_text}
+    def _call_and_parse(
+        self,
+        prompt: str | list[dict],
+        *,
+        max_tokens: int = 1024,
+        schema=None,
+        system: Optional[list[dict]] = None,
+        ensure_lemiddle_hashtag: bool = True,
+        use_cache: bool = False,
+        bypass_cache: bool = False,
+    ) -> dict:
+        """
+        Appelle Claude, parse le JSON de la réponse et ajoute #lemiddle si besoin.
+        Avec un schéma, la réponse passe par un outil imposé (JSON garanti, validé par
+        Pydantic) ; sans schéma, le JSON est extrait du texte de la réponse.
+        Une réponse identique déjà obtenue (même modèle, même prompt) est réutilisée
+        au lieu d'appeler l'API : en mémoire si use_cache est vrai, sur disque si
+        CLAUDE_RESPONSE_CACHE_DIR est défini.
+        
+        Args:
+            prompt: Prompt utilisateur complet (texte ou blocs de contenu)
+            max_tokens: Nombre maximum de tokens générés
+            schema: Schéma de sortie optionnel (voir services/claude_schemas.py)
+            system: Blocs du prompt système (par défaut _SYSTEM_BLOCKS)
+            ensure_lemiddle_hashtag: Si True, garantit la présence de "lemiddle" dans les hashtags
+            use_cache: Si True, active le cache mémoire du process (TTL CLAUDE_RESPONSE_CACHE_TTL)
+            bypass_cache: Si True, force un nouvel appel (la réponse remplace celle en cache)
+            
+        Returns:
+            Dictionnaire parsé depuis la réponse
+        """
+        system = system or _SYSTEM_BLOCKS
+        key = _request_key(self.model, max_tokens, system, prompt, schema) if use_cache or RESPONSE_CACHE_DIR else None
+        result = None if bypass_cache else _response_cache_get(key, use_cache)
+        if result is None:
+            if schema is not None:
+                result = self._complete_structured(prompt, max_tokens, schema, system)
+            else:
+                result = _parse_json_response(self._complete(prompt, max_tokens, system))
+            _response_cache_set(key, result, use_cache)
+        return _ensure_lemiddle_hashtag(result) if ensure_lemiddle_hashtag else result
 
-Réponds UNIQUEMENT avec un JSON valide au format suivant (sans markdown, sans backticks):
-{{
-    "text": "La phrase générée ici",
-    "caption": {{
-        "main": "Le texte de caption Instagram (2-3 phrases max, peut inclure un emoji)",
-        "hashtags": ["lemiddle", "hashtag2", "hashtag3", "hashtag4", "hashtag5"]
-    }},
-    "category": "mois1_injustices ou mois2_mythes ou mois3_redemption"
-}}"""
+    async def _acall_and_parse(
+        self,
+        prompt: str | list[dict],
+        *,
+        max_tokens: int = 1024,
+        schema=None,
+        system: Optional[list[dict]] = None,
+        ensure_lemiddle_hashtag: bool = True,
+        use_cache: bool = False,
+        bypass_cache: bool = False,
+    ) -> dict:
+        """Version asynchrone de _call_and_parse."""
+        system = system or _SYSTEM_BLOCKS
+        key = _request_key(self.model, max_tokens, system, prompt, schema) if use_cache or RESPONSE_CACHE_DIR else None
+        result = None if bypass_cache else _response_cache_get(key, use_cache)
+        if result is None:
+            if schema is not None:
+                result = await self._acomplete_structured(prompt, max_tokens, schema, system)
+            else:
+                result = _parse_json_response(await self._acomplete(prompt, max_tokens, system))
+            _response_cache_set(key, result, use_cache)
+        return _ensure_lemiddle_hashtag(result) if ensure_lemiddle_hashtag else result
 
-        message = self.client.messages.create(
-            model=self.model,
-            max_tokens=1024,
-            system=SYSTEM_PROMPT,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
+    def _build_phrase_prompt(self, category: Optional[str] = None, use_cache: bool = False) -> list[dict]:
+        """
+        Construit le prompt de génération d'une phrase "La Galère".
+        Les consignes fixes puis les exemples (jeu figé) forment des blocs mis en cache
+        côté Anthropic ; la catégorie et les contre-exemples suivent dans un dernier bloc.
+        Avec use_cache, les contre-exemples sont aussi tirés de jeux figés (voir _load_example_bundle).
+        """
+        examples, bad_examples = self._load_example_bundle(
+            "phrase", good_count=5, bad_count=3, use_cache=use_cache
         )
+        examples_text = _format_examples_cached(examples, self._format_phrase_examples)
+        bad_examples_text = self._format_bad_examples(bad_examples)
         
-        response_text = message.content[0].text.strip()
+        category_guidance = _PHRASE_CATEGORY_GUIDANCE.get(category, "")
         
-        # Parser le JSON
-        try:
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            # Essayer d'extraire le JSON si entouré de texte
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', response_text)
-            if json_match:
-                result = json.loads(json_match.group())
-            else:
-                raise ValueError(f"Impossible de parser la réponse JSON: {response_text}")
+        details = _PHRASE_DETAILS_TMPL.format_map({
+            "category_guidance": category_guidance,
+            "bad_examples_text": bad_examples_text or "Pas de mauvais exemples disponibles.",
+        })
+        
+        return [
+            _text_block(_PHRASE_INSTRUCTIONS, cache=True),
+            _text_block(_PHRASE_EXAMPLES_TMPL.format_map({"examples_text": examples_text}), cache=True),
+            _text_block(details),
+        ]
+
+    def _build_chiffre_prompt(self, category: Optional[str] = None) -> list[dict]:
+        """Construit le prompt de génération d'un chiffre (consignes et exemples en cache, catégorie en dernier)."""
+        examples, _ = self._load_example_bundle("chiffre", good_count=5, bad_count=0)
+        examples_text = _format_examples_cached(examples, self._format_chiffre_examples)
         
-        # S'assurer que lemiddle est dans les hashtags
-        if "lemiddle" not in result.get("caption", {}).get("hashtags", []):
-            result["caption"]["hashtags"].insert(0, "lemiddle")
+        if category in _VALID_CHIFFRE_CATEGORIES:
+            category_guidance = f"Catégorie imposée: {category}"
+        else:
+            category_guidance = _CHIFFRE_ANY_CATEGORY_GUIDANCE
         
-        return result
+        return [
+            _text_block(_CHIFFRE_INSTRUCTIONS, cache=True),
+            _text_block(_CHIFFRE_EXAMPLES_TMPL.format_map({"examples_text": examples_text}), cache=True),
+            _text_block(category_guidance),
+        ]
 
-    def generate_chiffre(self, category: Optional[str] = None) -> dict:
+    def _build_photo_caption_prompt(self, photo_context: Optional[str] = None) -> str:
+        """Construit le prompt de génération d'une caption photo ambiance."""
+        context_text = photo_context or "Une photo montrant des amis qui passent un bon moment ensemble (terrasse, bar, café)."
+        return _PHOTO_CAPTION_TMPL.format_map({"context_text": context_text})
+
+    def generate_phrase(self, category: Optional[str] = None, use_cache: bool = False) -> dict:
+        """
+        Génère une nouvelle phrase "La Galère".
+        
+        Args:
+            category: Catégorie optionnelle (mois1_injustices, mois2_mythes, mois3_redemption)
+            use_cache: Si True, réutilise la réponse d'un prompt identique (même catégorie,
+                       mêmes exemples) déjà généré dans ce process. Réservé aux itérations
+                       de réglage : en production chaque post doit être inédit.
+            
+        Returns:
+            Dictionnaire avec le contenu généré
+        """
+        return self._call_and_parse(
+            self._build_phrase_prompt(category, use_cache),
+            max_tokens=PHRASE_MAX_TOKENS,
+            schema=PhraseOutput,
+            system=_PHRASE_SYSTEM_BLOCKS,
+            use_cache=use_cache,
+        )
+
+    def generate_chiffre(self, category: Optional[str] = None, use_cache: bool = False) -> dict:
         """
         Génère un nouveau chiffre avec contexte.
         
         Args:
             category: Catégorie optionnelle (temps_trajet, metro_rer, cout_eloignement, 
                      interactions_sociales, statistiques)
+            use_cache: Si True, réutilise la réponse d'un prompt identique (voir generate_phrase)
             
         Returns:
             Dictionnaire avec le contenu généré
         """
-        examples = self._load_examples("chiffre", count=5)
-        examples_text = self._format_chiffre_examples(examples)
-        
-        category_guidance = ""
-        categories_possibles = ["temps_trajet", "metro_rer", "cout_eloignement", 
-                               "interactions_sociales", "statistiques"]
+        return self._call_and_parse(
+            self._build_chiffre_prompt(category), max_tokens=CHIFFRE_MAX_TOKENS, schema=ChiffreOutput, use_cache=use_cache
+        )
+
+    def generate_photo_caption(self, photo_context: Optional[str] = None) -> dict:
+        """
+        Génère une caption pour un post photo ambiance.
         
-        if category in categories_possibles:
-            category_guidance = f"Catégorie imposée: {category}"
-        else:
-            category_guidance = f"Choisis une catégorie parmi: {', '.join(categories_possibles)}"
+        Args:
+            photo_context: Description optionnelle de la photo
+            
+        Returns:
+            Dictionnaire avec la caption générée
+        """
+        return self._call_and_parse(
+            self._build_photo_caption_prompt(photo_context),
+            max_tokens=PHOTO_CAPTION_MAX_TOKENS,
+            schema=PhotoCaptionOutput,
+            ensure_lemiddle_hashtag=False,
+        )
+
+    def _generate_many(
+        self,
+        prompt: list[dict],
+        n: int,
+        max_tokens: int,
+        system: Optional[list[dict]] = None,
+    ) -> list[dict]:
+        """
+        Génère n contenus en un seul appel à partir d'un prompt phrase/chiffre.
         
-        prompt = f"""Génère UN SEUL nouveau chiffre pour la série "Le Chiffre" de Le Middle.
+        Args:
+            prompt: Blocs du prompt unitaire (voir _build_phrase_prompt / _build_chiffre_prompt)
+            n: Nombre de contenus à générer
+            max_tokens: Plafond de tokens pour un seul contenu
+            system: Blocs du prompt système (par défaut _SYSTEM_BLOCKS)
+            
+        Returns:
+            Liste de n dictionnaires, avec #lemiddle garanti dans chaque caption
+        """
+        if n < 1:
+            return []
+        result = self._call_and_parse(
+            [*prompt, _text_block(_BATCH_TMPL.format_map({"n": n}))],
+            max_tokens=max_tokens * n,
+            system=system,
+            ensure_lemiddle_hashtag=False,
+        )
+        items = result.get("items") if isinstance(result, dict) else None
+        if not isinstance(items, list) or len(items) != n:
+            raise ValueError(f"Réponse groupée invalide: {n} éléments attendus, reçu {result}")
+        return [_ensure_lemiddle_hashtag(item) for item in items]
 
-FORMAT ATTENDU:
-- Un chiffre central (peut être 01, 02, ... 99, 100, etc.)
-- Un texte de contexte en haut (la mise en situation)
-- Un texte d'unité en bas (l'unité avec une pointe d'humour)
-- Le chiffre peut être réel ou légèrement absurde
+    def generate_phrases(self, n: int, category: Optional[str] = None) -> list[dict]:
+        """
+        Génère plusieurs phrases "La Galère" en un seul appel API
+        (le prompt système et les exemples ne sont envoyés qu'une fois).
+        
+        Args:
+            n: Nombre de phrases à générer
+            category: Catégorie optionnelle (mois1_injustices, mois2_mythes, mois3_redemption)
+            
+        Returns:
+            Liste de dictionnaires au même format que generate_phrase
+        """
+        return self._generate_many(
+            self._build_phrase_prompt(category), n, PHRASE_MAX_TOKENS, system=_PHRASE_SYSTEM_BLOCKS
+        )
 
-{category_guidance}
+    def generate_chiffres(self, n: int, category: Optional[str] = None) -> list[dict]:
+        """
+        Génère plusieurs chiffres en un seul appel API.
+        
+        Args:
+            n: Nombre de chiffres à générer
+            category: Catégorie optionnelle (voir generate_chiffre)
+            
+        Returns:
+            Liste de dictionnaires au même format que generate_chiffre
+        """
+        return self._generate_many(self._build_chiffre_prompt(category), n, CHIFFRE_MAX_TOKENS)
 
-EXEMPLES DE CHIFFRES EXISTANTS (à utiliser comme inspiration, NE PAS COPIER):
-{examples_text}
+    async def agenerate_phrase(self, category: Optional[str] = None, use_cache: bool = False) -> dict:
+        """Version asynchrone de generate_phrase."""
+        return await self._acall_and_parse(
+            self._build_phrase_prompt(category, use_cache),
+            max_tokens=PHRASE_MAX_TOKENS,
+            schema=PhraseOutput,
+            system=_PHRASE_SYSTEM_BLOCKS,
+            use_cache=use_cache,
+        )
 
-Réponds UNIQUEMENT avec un JSON valide au format suivant (sans markdown, sans backticks):
-{{
-    "content": {{
-        "context_text": "Le texte de contexte en haut",
-        "number": "42",
-        "unit_text": "l'unité avec commentaire sarcastique"
-    }},
-    "caption": {{
-        "main": "Le texte de caption Instagram (2-3 phrases, développe l'idée)",
-        "hashtags": ["lemiddle", "hashtag2", "hashtag3", "hashtag4", "hashtag5"],
-        "cta": "Un call-to-action (ex: Retrouvez-vous simplement. / On se capte au Middle.)"
-    }},
-    "category": "la_categorie_choisie"
-}}"""
+    async def agenerate_chiffre(self, category: Optional[str] = None, use_cache: bool = False) -> dict:
+        """Version asynchrone de generate_chiffre."""
+        return await self._acall_and_parse(
+            self._build_chiffre_prompt(category), max_tokens=CHIFFRE_MAX_TOKENS, schema=ChiffreOutput, use_cache=use_cache
+        )
 
-        message = self.client.messages.create(
-            model=self.model,
-            max_tokens=1024,
-            system=SYSTEM_PROMPT,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
+    async def agenerate_photo_caption(self, photo_context: Optional[str] = None) -> dict:
+        """Version asynchrone de generate_photo_caption."""
+        return await self._acall_and_parse(
+            self._build_photo_caption_prompt(photo_context),
+            max_tokens=PHOTO_CAPTION_MAX_TOKENS,
+            schema=PhotoCaptionOutput,
+            ensure_lemiddle_hashtag=False,
         )
+
+    def generate_batch(
+        self,
+        requests: list[tuple[str, Optional[str]]],
+        poll_interval: float = 10.0,
+    ) -> list:
+        """
+        Génère plusieurs contenus via l'API Message Batches (coût divisé par deux,
+        traitement asynchrone côté Anthropic : de quelques minutes à 24 h).
+        Réservé aux générations qui peuvent attendre ; generate_phrase et
+        generate_chiffre restent des appels directs.
         
-        response_text = message.content[0].text.strip()
-        
-        # Parser le JSON
-        try:
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            # Essayer d'extraire le JSON si entouré de texte
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', response_text)
-            if json_match:
-                result = json.loads(json_match.group())
-            else:
-                raise ValueError(f"Impossible de parser la réponse JSON: {response_text}")
+        Args:
+            requests: Liste de tuples (type, catégorie) avec type 'phrase' ou 'chiffre'
+            poll_interval: Délai en secondes entre deux vérifications du statut du batch
+            
+        Returns:
+            Résultats dans l'ordre des requêtes ; une requête en échec est
+            représentée par son exception
+        """
+        builders = {
+            "phrase": (self._build_phrase_prompt, PhraseOutput, _PHRASE_SYSTEM_BLOCKS, PHRASE_MAX_TOKENS),
+            "chiffre": (self._build_chiffre_prompt, ChiffreOutput, _SYSTEM_BLOCKS, CHIFFRE_MAX_TOKENS),
+        }
+        schemas = []
+        batch_requests = []
+        for i, (post_type, category) in enumerate(requests):
+            build_prompt, schema, system, max_tokens = builders[post_type]
+            schemas.append(schema)
+            batch_requests.append({
+                "custom_id": f"req-{i}",
+                "params": self._request_params(build_prompt(category), max_tokens, schema, system),
+            })
         
-        # S'assurer que lemiddle est dans les hashtags
-        if "lemiddle" not in result.get("caption", {}).get("hashtags", []):
-            result["caption"]["hashtags"].insert(0, "lemiddle")
+        batch = self.client.messages.batches.create(requests=batch_requests)
+        while batch.processing_status != "ended":
+            time.sleep(poll_interval)
+            batch = self.client.messages.batches.retrieve(batch.id)
         
-        return result
+        results = [RuntimeError("Requête absente des résultats du batch") for _ in requests]
+        for entry in self.client.messages.batches.results(batch.id):
+            i = int(entry.custom_id.removeprefix("req-"))
+            if entry.result.type != "succeeded":
+                results[i] = RuntimeError(f"Requête {entry.custom_id} du batch {batch.id}: {entry.result.type}")
+                continue
+            try:
+                message = entry.result.message
+                if schemas[i] is not None:
+                    result = _tool_output(message, schemas[i])
+                else:
+                    result = _parse_json_response(_message_text(message))
+                results[i] = _ensure_lemiddle_hashtag(result)
+            except ValueError as e:
+                results[i] = e
+        return results
 
-    def generate_photo_caption(self, photo_context: Optional[str] = None) -> dict:
+    def generate_concurrently(self, requests: list[tuple[str, Optional[str]]]) -> list:
         """
-        Génère une caption pour un post photo ambiance.
+        Génère plusieurs contenus en parallèle (asyncio.gather) depuis du code synchrone,
+        avec au plus MAX_CONCURRENCY générations en cours à la fois.
         
         Args:
-            photo_context: Description optionnelle de la photo
+            requests: Liste de tuples (type, catégorie) avec type 'phrase' ou 'chiffre'
             
         Returns:
-            Dictionnaire avec la caption générée
+            Résultats dans l'ordre des requêtes ; une génération en échec est
+            représentée par son exception
         """
-        context_text = photo_context or "Une photo montrant des amis qui passent un bon moment ensemble (terrasse, bar, café)."
+        generators = {"phrase": self.agenerate_phrase, "chiffre": self.agenerate_chiffre}
         
-        prompt = f"""Génère une caption Instagram pour un post photo "ambiance" de Le Middle.
+        async def _run() -> list:
+            semaphore = asyncio.Semaphore(self.MAX_CONCURRENCY)
+            
+            async def _generate(post_type: str, category: Optional[str]):
+                async with semaphore:
+                    return await generators[post_type](category)
+            
+            try:
+                return await asyncio.gather(
+                    *(_generate(post_type, category) for post_type, category in requests),
+                    return_exceptions=True,
+                )
+            finally:
+                # Le client async est lié à cette boucle : le fermer avant qu'elle ne s'arrête
+                if self._async_client is not None:
+                    await self._async_client.close()
+                    self._async_client = None
+        
+        return asyncio.run(_run())
 
-CONTEXTE DE LA PHOTO:
-{context_text}
 
-L'objectif est de montrer la "récompense" - le moment passé ensemble après avoir trouvé le bon lieu de rendez-vous.
+@functools.lru_cache(maxsize=None)
+def _output_tool(schema) -> dict:
+    """Définition d'outil d'un schéma de sortie (JSON schema calculé une seule fois)."""
+    return output_tool(schema)
 
-Réponds UNIQUEMENT avec un JSON valide au format suivant (sans markdown, sans backticks):
-{{
-    "caption": {{
-        "main": "Le texte de caption (2-3 lignes, évoque le moment partagé, peut inclure un emoji)",
-        "hashtags": ["lemiddle", "paris", "hashtag3", "hashtag4", "hashtag5"]
-    }}
-}}"""
 
-        message = self.client.messages.create(
-            model=self.model,
-            max_tokens=512,
-            system=SYSTEM_PROMPT,
-            messages=[
-                {"role": "user", "content": prompt}
-            ]
-        )
-        
-        response_text = message.content[0].text.strip()
-        
-        # Parser le JSON
-        try:
-            result = json.loads(response_text)
-        except json.JSONDecodeError:
-            import re
-            json_match = re.search(r'\{[\s\S]*\}', response_text)
-            if json_match:
-                result = json.loads(json_match.group())
-            else:
-                raise ValueError(f"Impossible de parser la réponse JSON: {response_text}")
+def _message_text(message) -> str:
+    """Concatène les blocs texte d'une réponse Claude."""
+    return "".join(block.text for block in message.content if block.type == "text")
+
+
+def _tool_output(message, schema) -> dict:
+    """
+    Extrait et valide l'appel d'outil d'une réponse Claude.
+    
+    Args:
+        message: Message final renvoyé par l'API
+        schema: Schéma de sortie attendu
         
-        return result
+    Returns:
+        Dictionnaire validé (champs optionnels absents omis)
+    """
+    for block in message.content:
+        if block.type == "tool_use" and block.name == schema.tool_name:
+            return schema.model_validate(block.input).model_dump(exclude_none=True)
+    raise ValueError(f"Réponse sans appel à l'outil {schema.tool_name}: {message.content}")
+
+
+def _parse_json_response(response_text: str) -> dict:
+    """
+    Parse la réponse JSON de Claude, en extrayant l'objet s'il est entouré de texte.
+    Le texte brut est parsé tel quel (les blancs autour du JSON sont tolérés) ;
+    sinon le premier objet complet est décodé à partir du premier "{", sans copie.
+    """
+    try:
+        return _loads(response_text)
+    except ValueError:
+        # Essayer d'extraire le JSON si entouré de texte
+        start = response_text.find("{")
+        if start != -1:
+            try:
+                return _DECODER.raw_decode(response_text, start)[0]
+            except ValueError:
+                pass
+        raise ValueError(f"Impossible de parser la réponse JSON: {response_text}")
 
 
+def _ensure_lemiddle_hashtag(result: dict) -> dict:
+    """S'assure que lemiddle est dans les hashtags."""
+    if "lemiddle" not in result.get("caption", {}).get("hashtags", []):
+        result["caption"]["hashtags"].insert(0, "lemiddle")
+    return result
+
+
+@functools.lru_cache(maxsize=1)
 def check_claude_availability() -> dict:
-    """Vérifie si le service Claude est disponible et configuré."""
+    """
+    Vérifie si le service Claude est disponible et configuré.
+    Le résultat ne dépend que de l'environnement chargé à l'import : il est calculé
+    une seule fois (check_claude_availability.cache_clear() pour le recalculer).
+    """
     return {
         "package_installed": ANTHROPIC_AVAILABLE,
         "api_key_configured": bool(ANTHROPIC_API_KEY),
@@ -494,19 +1304,19 @@ if __name__ == "__main__":
     if status["ready"]:
         service = ClaudeService()
         
-        print("\n=== Test génération phrase ===")
-        try:
-            phrase = service.generate_phrase()
-            print(json.dumps(phrase, indent=2, ensure_ascii=False))
-        except Exception as e:
-            print(f"Erreur: {e}")
-        
-        print("\n=== Test génération chiffre ===")
-        try:
-            chiffre = service.generate_chiffre()
-            print(json.dumps(chiffre, indent=2, ensure_ascii=False))
-        except Exception as e:
-            print(f"Erreur: {e}")
+        # Les trois générations tournent en parallèle : durée ≈ la plus lente
+        with ThreadPoolExecutor(max_workers=3) as executor:
+            futures = {
+                executor.submit(service.generate_phrase): "phrase",
+                executor.submit(service.generate_chiffre): "chiffre",
+                executor.submit(service.generate_photo_caption): "caption photo",
+            }
+            for future in as_completed(futures):
+                print(f"\n=== Test génération {futures[future]} ===")
+                try:
+                    print(_dumps(future.result()))
+                except Exception as e:
+                    print(f"Erreur: {e}")
     else:
         print("\nPour configurer Claude:")
         print("1. pip install anthropic")
@@ -1,13 +1,22 @@
 """
 Service pour publier des images sur Instagram via l'API Graph
 """
+import asyncio
+import functools
+import json
 import os
+import re
 import time
 from pathlib import Path
-from typing import Optional
+from importlib.util import find_spec
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Optional, Union
 import requests
-import cloudinary
-import cloudinary.uploader
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+if TYPE_CHECKING:
+    import httpx
 
 from config.instagram_config import (
     INSTAGRAM_BUSINESS_ACCOUNT_ID,
@@ -21,6 +30,38 @@ from config.instagram_config import (
     validate_config,
 )
 
+# orjson (optionnel) : décodage des réponses JSON de l'API Graph plus rapide, repli sur la stdlib sinon
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
+# Champ "id" des réponses de création/publication ({"id": "..."}), lu sans décoder tout le JSON
+_ID_RE = re.compile(rb'"id"\s*:\s*"([^"]+)"')
+
+# Client async (publish_image_async) : HTTP/2 si le package h2 est installé, les publications
+# simultanées partagent alors une seule connexion vers graph.facebook.com
+HTTP2_AVAILABLE = find_spec("h2") is not None
+
+# Nouvelles tentatives sur erreurs transitoires. Seules les requêtes idempotentes (GET)
+# sont rejouées : un POST de création ou de publication ne doit jamais partir deux fois.
+_RETRY = Retry(
+    total=3,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"GET"}),
+)
+
+# Options d'upload Cloudinary communes (lecture seule, copiées à chaque appel)
+_CLOUDINARY_OPTS = MappingProxyType({
+    "folder": "lemiddle-instagram",
+    "resource_type": "image",
+    "use_filename": True,
+    "unique_filename": True,
+})
+
 
 class InstagramService:
     """Service pour publier sur Instagram via l'API Graph."""
@@ -30,12 +71,26 @@ class InstagramService:
         self.account_id = INSTAGRAM_BUSINESS_ACCOUNT_ID
         self.access_token = FACEBOOK_PAGE_ACCESS_TOKEN
         
+        # URLs des endpoints, constantes pour une instance
+        self._account_url = f"{INSTAGRAM_API_BASE}/{self.account_id}"
+        self._media_url = get_instagram_media_url()
+        self._publish_url = get_instagram_publish_url()
+        
+        # Session HTTP partagée : les appels suivants réutilisent la connexion TLS vers graph.facebook.com
+        self.session = requests.Session()
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=10, max_retries=_RETRY))
+        # Token envoyé en en-tête plutôt que dans chaque payload (hors corps de requête et URLs)
+        self.session.headers["Authorization"] = f"Bearer {self.access_token}"
+        
         # Configurer Cloudinary si disponible
         self._setup_cloudinary()
 
     def _setup_cloudinary(self) -> None:
         """Configure Cloudinary pour l'hébergement d'images."""
         if all([CLOUDINARY_CLOUD_NAME, CLOUDINARY_API_KEY, CLOUDINARY_API_SECRET]):
+            # Import différé : le SDK n'est chargé que si Cloudinary est configuré
+            import cloudinary
+            
             cloudinary.config(
                 cloud_name=CLOUDINARY_CLOUD_NAME,
                 api_key=CLOUDINARY_API_KEY,
@@ -48,19 +103,19 @@ class InstagramService:
 
     def check_configuration(self) -> dict:
         """Vérifie la configuration du service."""
-        config_status = validate_config()
+        status = check_instagram_availability()
         return {
-            "instagram_api": config_status["instagram"],
-            "cloudinary": config_status["cloudinary"],
-            "ready": config_status["instagram"] and config_status["cloudinary"],
+            "instagram_api": status["instagram_configured"],
+            "cloudinary": status["cloudinary_configured"],
+            "ready": status["ready"],
         }
 
-    def upload_to_cloudinary(self, image_path: Path, public_id: Optional[str] = None) -> str:
+    def upload_to_cloudinary(self, image_path: Union[Path, str], public_id: Optional[str] = None) -> str:
         """
         Upload une image sur Cloudinary.
         
         Args:
-            image_path: Chemin vers l'image locale
+            image_path: Chemin vers l'image locale (ou URL distante)
             public_id: ID public optionnel pour l'image
             
         Returns:
@@ -69,28 +124,41 @@ class InstagramService:
         if not self.cloudinary_configured:
             raise ValueError("Cloudinary n'est pas configuré. Ajoutez les credentials dans .env")
         
-        upload_options = {
-            "folder": "lemiddle-instagram",
-            "resource_type": "image",
-        }
+        import cloudinary.uploader
+        
+        upload_options = dict(_CLOUDINARY_OPTS)
         
         if public_id:
             upload_options["public_id"] = public_id
         
-        result = cloudinary.uploader.upload(str(image_path), **upload_options)
+        result = cloudinary.uploader.upload(os.fspath(image_path), **upload_options)
         return result["secure_url"]
 
+    def upload_from_url(self, url: str, public_id: Optional[str] = None) -> str:
+        """
+        Upload sur Cloudinary une image déjà en ligne (ex: sortie Replicate).
+        Cloudinary la récupère lui-même : l'image ne transite pas par la machine locale.
+        
+        Args:
+            url: URL publique de l'image source
+            public_id: ID public optionnel pour l'image
+            
+        Returns:
+            URL publique Cloudinary de l'image
+        """
+        # cloudinary.uploader.upload accepte directement une URL distante
+        return self.upload_to_cloudinary(url, public_id=public_id)
+
     def get_account_info(self) -> dict:
         """Récupère les informations du compte Instagram."""
-        url = f"{INSTAGRAM_API_BASE}/{self.account_id}"
+        url = self._account_url
         params = {
             "fields": "username,name,profile_picture_url,followers_count,media_count",
-            "access_token": self.access_token,
         }
         
-        response = requests.get(url, params=params)
+        response = self.session.get(url, params=params)
         response.raise_for_status()
-        return response.json()
+        return _loads(response.content)
 
     def create_media_container(
         self,
@@ -107,33 +175,19 @@ class InstagramService:
         Returns:
             ID du container créé
         """
-        url = get_instagram_media_url()
+        url = self._media_url
         
         payload = {
             "image_url": image_url,
             "caption": caption,
-            "access_token": self.access_token,
         }
 
-        response = requests.post(url, data=payload)
+        response = self.session.post(url, data=payload)
 
         if not response.ok:
-            _err_msg = response.reason
-            try:
-                _err_body = response.json()
-                if isinstance(_err_body.get("error"), dict):
-                    _api_msg = _err_body["error"].get("message", "")
-                    _code = _err_body["error"].get("code")
-                    if _api_msg:
-                        _err_msg = _api_msg
-                    if _code == 190:
-                        _err_msg = f"Token Instagram/Facebook expiré ou invalide. {_err_msg} Mettez à jour FACEBOOK_PAGE_ACCESS_TOKEN dans .env (Meta Developer Console)."
-            except Exception:
-                pass
-            raise requests.HTTPError(_err_msg, response=response)
-        
-        result = response.json()
-        return result["id"]
+            raise requests.HTTPError(_graph_error_message(response.content, response.reason), response=response)
+        
+        return _response_id(response)
 
     def check_container_status(self, container_id: str) -> dict:
         """
@@ -148,12 +202,11 @@ class InstagramService:
         url = f"{INSTAGRAM_API_BASE}/{container_id}"
         params = {
             "fields": "status_code,status",
-            "access_token": self.access_token,
         }
         
-        response = requests.get(url, params=params)
+        response = self.session.get(url, params=params)
         response.raise_for_status()
-        return response.json()
+        return _loads(response.content)
 
     def publish_media(self, container_id: str) -> str:
         """
@@ -165,18 +218,16 @@ class InstagramService:
         Returns:
             ID du média publié
         """
-        url = get_instagram_publish_url()
+        url = self._publish_url
         
         payload = {
             "creation_id": container_id,
-            "access_token": self.access_token,
         }
         
-        response = requests.post(url, data=payload)
+        response = self.session.post(url, data=payload)
         response.raise_for_status()
         
-        result = response.json()
-        return result["id"]
+        return _response_id(response)
 
     def wait_for_container_ready(
         self,
@@ -190,14 +241,16 @@ class InstagramService:
         Args:
             container_id: ID du container
             max_wait: Temps max d'attente en secondes
-            check_interval: Intervalle entre les vérifications
+            check_interval: Intervalle maximum entre les vérifications (l'attente commence
+                à 0,5 s et croît jusqu'à cette valeur)
             
         Returns:
             True si prêt, False sinon
         """
-        start_time = time.time()
+        deadline = time.monotonic() + max_wait
+        delay = 0.5
         
-        while time.time() - start_time < max_wait:
+        while True:
             status = self.check_container_status(container_id)
             status_code = status.get("status_code")
             
@@ -206,14 +259,24 @@ class InstagramService:
             elif status_code == "ERROR":
                 raise Exception(f"Erreur lors du traitement: {status.get('status')}")
             
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
             print(f"Container status: {status_code}, waiting...")
-            time.sleep(check_interval)
+            time.sleep(min(delay, remaining))
+            delay = min(delay * 1.6, check_interval)
         
         return False
 
+    def _upload_image(self, image_path: Union[Path, str]) -> str:
+        """Upload sur Cloudinary un fichier local ou une URL http(s) (récupérée par Cloudinary)."""
+        if isinstance(image_path, str) and image_path.startswith(("http://", "https://")):
+            return self.upload_from_url(image_path)
+        return self.upload_to_cloudinary(image_path)
+
     def publish_image(
         self,
-        image_path: Path,
+        image_path: Union[Path, str],
         caption: str,
         wait_for_ready: bool = True,
     ) -> dict:
@@ -221,7 +284,7 @@ class InstagramService:
         Publie une image sur Instagram (workflow complet).
         
         Args:
-            image_path: Chemin vers l'image locale
+            image_path: Chemin vers l'image locale, ou URL http(s) d'une image en ligne
             caption: Légende du post (avec hashtags)
             wait_for_ready: Attendre que le container soit prêt
             
@@ -237,7 +300,7 @@ class InstagramService:
         
         # Étape 1: Upload sur Cloudinary
         print("Uploading image to Cloudinary...")
-        image_url = self.upload_to_cloudinary(image_path)
+        image_url = self._upload_image(image_path)
         result["image_url"] = image_url
         print(f"Image uploaded: {image_url}")
 
@@ -264,6 +327,121 @@ class InstagramService:
         
         return result
 
+    def new_async_client(self) -> "httpx.AsyncClient":
+        """
+        Crée un client httpx async pour l'API Graph (HTTP/2 si disponible).
+        Le partager entre plusieurs publish_image_async lancés avec asyncio.gather
+        leur fait réutiliser la même connexion.
+        """
+        import httpx
+        
+        return httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=30.0,
+            headers={"Authorization": f"Bearer {self.access_token}"},
+        )
+
+    async def _await_container_ready(
+        self,
+        client: "httpx.AsyncClient",
+        container_id: str,
+        max_wait: int = 60,
+        check_interval: int = 5,
+    ) -> bool:
+        """Version async de wait_for_container_ready (même backoff, sans bloquer la boucle)."""
+        deadline = time.monotonic() + max_wait
+        delay = 0.5
+        
+        while True:
+            response = await client.get(
+                f"{INSTAGRAM_API_BASE}/{container_id}",
+                params={"fields": "status_code,status"},
+            )
+            response.raise_for_status()
+            status = _loads(response.content)
+            status_code = status.get("status_code")
+            
+            if status_code == "FINISHED":
+                return True
+            elif status_code == "ERROR":
+                raise Exception(f"Erreur lors du traitement: {status.get('status')}")
+            
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            print(f"Container status: {status_code}, waiting...")
+            await asyncio.sleep(min(delay, remaining))
+            delay = min(delay * 1.6, check_interval)
+
+    async def publish_image_async(
+        self,
+        image_path: Union[Path, str],
+        caption: str,
+        wait_for_ready: bool = True,
+        client: Optional["httpx.AsyncClient"] = None,
+    ) -> dict:
+        """
+        Version async de publish_image : plusieurs publications peuvent tourner en parallèle.
+        
+        Args:
+            image_path: Chemin vers l'image locale, ou URL http(s) d'une image en ligne
+            caption: Légende du post (avec hashtags)
+            wait_for_ready: Attendre que le container soit prêt
+            client: Client httpx partagé (voir new_async_client) ; un client temporaire sinon
+            
+        Returns:
+            Dictionnaire avec les IDs et statuts
+        """
+        if client is None:
+            async with self.new_async_client() as own_client:
+                return await self.publish_image_async(image_path, caption, wait_for_ready, own_client)
+        
+        import httpx
+        
+        result = {
+            "image_url": None,
+            "container_id": None,
+            "media_id": None,
+            "status": "pending",
+        }
+        
+        # Étape 1: Upload sur Cloudinary (SDK synchrone, exécuté dans un thread)
+        print("Uploading image to Cloudinary...")
+        image_url = await asyncio.to_thread(self._upload_image, image_path)
+        result["image_url"] = image_url
+        print(f"Image uploaded: {image_url}")
+        
+        # Étape 2: Créer le container média
+        print("Creating media container...")
+        response = await client.post(self._media_url, data={"image_url": image_url, "caption": caption})
+        if response.is_error:
+            raise httpx.HTTPStatusError(
+                _graph_error_message(response.content, response.reason_phrase),
+                request=response.request,
+                response=response,
+            )
+        container_id = _response_id(response)
+        result["container_id"] = container_id
+        print(f"Container created: {container_id}")
+        
+        # Étape 3: Attendre que le container soit prêt
+        if wait_for_ready:
+            print("Waiting for container to be ready...")
+            if not await self._await_container_ready(client, container_id):
+                result["status"] = "timeout"
+                return result
+        
+        # Étape 4: Publier
+        print("Publishing media...")
+        response = await client.post(self._publish_url, data={"creation_id": container_id})
+        response.raise_for_status()
+        media_id = _response_id(response)
+        result["media_id"] = media_id
+        result["status"] = "published"
+        print(f"Media published! ID: {media_id}")
+        
+        return result
+
     def format_caption(
         self,
         main_text: str,
@@ -286,15 +464,57 @@ class InstagramService:
         # Ajouter une ligne vide avant les hashtags
         parts.append("")
         
-        # Formater les hashtags
-        formatted_hashtags = " ".join([f"#{tag}" for tag in hashtags])
-        parts.append(formatted_hashtags)
+        parts.append(format_hashtags(hashtags))
         
         return "\n".join(parts)
 
 
+def format_hashtags(hashtags: list[str]) -> str:
+    """Formate une liste de hashtags (sans #) en une ligne prête à publier."""
+    return "#" + " #".join(hashtags) if hashtags else ""
+
+
+def _graph_error_message(content: bytes, default: str) -> str:
+    """
+    Extrait un message lisible d'une réponse d'erreur de l'API Graph.
+    
+    Args:
+        content: Corps de la réponse
+        default: Message à utiliser si le corps n'en contient pas (raison HTTP)
+        
+    Returns:
+        Message d'erreur (avec une consigne de renouvellement si le token a expiré)
+    """
+    _err_msg = default
+    try:
+        _err_body = _loads(content)
+        if isinstance(_err_body.get("error"), dict):
+            _api_msg = _err_body["error"].get("message", "")
+            _code = _err_body["error"].get("code")
+            if _api_msg:
+                _err_msg = _api_msg
+            if _code == 190:
+                _err_msg = f"Token Instagram/Facebook expiré ou invalide. {_err_msg} Mettez à jour FACEBOOK_PAGE_ACCESS_TOKEN dans .env (Meta Developer Console)."
+    except Exception:
+        pass
+    return _err_msg
+
+
+def _response_id(response) -> str:
+    """Retourne le champ "id" d'une réponse de l'API Graph (requests ou httpx)."""
+    match = _ID_RE.search(response.content)
+    if match:
+        return match.group(1).decode()
+    return _loads(response.content)["id"]
+
+
+@functools.lru_cache(maxsize=1)
 def check_instagram_availability() -> dict:
-    """Vérifie si le service Instagram est disponible et configuré."""
+    """
+    Vérifie si le service Instagram est disponible et configuré.
+    Les credentials sont lus une fois à l'import de la configuration : le résultat est
+    calculé une seule fois (check_instagram_availability.cache_clear() pour le recalculer).
+    """
     config = validate_config()
     return {
         "instagram_configured": config["instagram"],
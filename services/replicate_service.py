@@ -1,6 +1,8 @@
 """
 Service pour générer des images avec l'API Replicate (Flux.1 / SDXL)
 """
+import asyncio
+import functools
 import os
 import time
 from typing import Optional
@@ -13,6 +15,15 @@ try:
 except ImportError:
     REPLICATE_AVAILABLE = False
 
+# Prêt si le package est installé et le token configuré ; le SDK lit le token depuis l'environnement
+_REPLICATE_READY = REPLICATE_AVAILABLE and bool(REPLICATE_API_TOKEN)
+if _REPLICATE_READY:
+    os.environ["REPLICATE_API_TOKEN"] = REPLICATE_API_TOKEN
+
+# Intervalle entre deux vérifications du statut d'une prédiction (secondes)
+POLL_INTERVAL = 0.5
+_TERMINAL_STATUSES = ("succeeded", "failed", "canceled")
+
 
 class ReplicateService:
     """Service pour générer des images via Replicate API."""
@@ -38,13 +49,11 @@ class ReplicateService:
         Args:
             model: Nom du modèle à utiliser (flux_schnell, flux_dev, sdxl)
         """
-        if not REPLICATE_AVAILABLE:
-            raise ImportError("Le package 'replicate' n'est pas installé. Exécutez: pip install replicate")
-        
-        if not REPLICATE_API_TOKEN:
+        if not _REPLICATE_READY:
+            if not REPLICATE_AVAILABLE:
+                raise ImportError("Le package 'replicate' n'est pas installé. Exécutez: pip install replicate")
             raise ValueError("REPLICATE_API_TOKEN non configuré. Ajoutez-le dans le fichier .env")
         
-        os.environ["REPLICATE_API_TOKEN"] = REPLICATE_API_TOKEN
         self.model_name = self.MODELS.get(model, self.MODELS["flux_schnell"])
         self.client = replicate
 
@@ -56,18 +65,50 @@ class ReplicateService:
             base_prompt: Prompt de base décrivant la scène
             style: Style prédéfini à ajouter (cafe_terrace, wine_bar, bistro)
         """
-        enhanced = base_prompt
-        
-        if style and style in self.STYLE_PROMPTS:
-            enhanced = f"{base_prompt}, {self.STYLE_PROMPTS[style]}"
-        else:
-            # Ajouter des détails par défaut pour le style Le Middle
-            enhanced = f"{base_prompt}, warm natural lighting, candid authentic moment, film photography style, editorial quality, 35mm aesthetic"
+        return _enhance_prompt(base_prompt, self.STYLE_PROMPTS.get(style) if style else None)
+
+    def _prediction_input(
+        self,
+        prompt: str,
+        style: Optional[str],
+        width: int,
+        height: int,
+        num_inference_steps: int,
+    ) -> dict:
+        """Construit les paramètres d'entrée du modèle pour une génération."""
+        enhanced_prompt = self.enhance_prompt(prompt, style)
         
-        # Ajouter des négatifs implicites via le prompt positif
-        enhanced += ", high quality, professional photography, well-lit"
+        print(f"Generating image with prompt: {enhanced_prompt[:100]}...")
         
-        return enhanced
+        # Paramètres selon le modèle
+        if "flux" in self.model_name:
+            return {
+                "prompt": enhanced_prompt,
+                "go_fast": True,
+                "megapixels": "1",
+                "num_outputs": 1,
+                "aspect_ratio": "4:5" if height > width else "1:1",
+                "output_format": "png",
+                "output_quality": 90,
+                "num_inference_steps": num_inference_steps,
+            }
+        # SDXL
+        return {
+            "prompt": enhanced_prompt,
+            "width": width,
+            "height": height,
+            "num_outputs": 1,
+            "scheduler": "K_EULER",
+            "num_inference_steps": 30,
+            "guidance_scale": 7.5,
+            "negative_prompt": "blurry, low quality, distorted faces, bad anatomy, watermark, text",
+        }
+
+    def _prediction_target(self) -> dict:
+        """Modèle officiel ("owner/name") ou version épinglée ("owner/name:version")."""
+        if ":" in self.model_name:
+            return {"version": self.model_name.split(":", 1)[1]}
+        return {"model": self.model_name}
 
     def generate_image(
         self,
@@ -90,44 +131,51 @@ class ReplicateService:
         Returns:
             URL de l'image générée
         """
-        enhanced_prompt = self.enhance_prompt(prompt, style)
+        input_params = self._prediction_input(prompt, style, width, height, num_inference_steps)
         
-        print(f"Generating image with prompt: {enhanced_prompt[:100]}...")
+        # Création de la prédiction puis vérification du statut toutes les POLL_INTERVAL secondes
+        prediction = self.client.predictions.create(**self._prediction_target(), input=input_params)
+        while prediction.status not in _TERMINAL_STATUSES:
+            time.sleep(POLL_INTERVAL)
+            prediction.reload()
         
-        # Paramètres selon le modèle
-        if "flux" in self.model_name:
-            input_params = {
-                "prompt": enhanced_prompt,
-                "go_fast": True,
-                "megapixels": "1",
-                "num_outputs": 1,
-                "aspect_ratio": "4:5" if height > width else "1:1",
-                "output_format": "png",
-                "output_quality": 90,
-                "num_inference_steps": num_inference_steps,
-            }
-        else:
-            # SDXL
-            input_params = {
-                "prompt": enhanced_prompt,
-                "width": width,
-                "height": height,
-                "num_outputs": 1,
-                "scheduler": "K_EULER",
-                "num_inference_steps": 30,
-                "guidance_scale": 7.5,
-                "negative_prompt": "blurry, low quality, distorted faces, bad anatomy, watermark, text",
-            }
+        image_url = _prediction_url(prediction)
+        print(f"Image generated: {image_url}")
+        return image_url
+
+    async def generate_image_async(
+        self,
+        prompt: str,
+        style: Optional[str] = None,
+        width: int = 1080,
+        height: int = 1350,
+        num_inference_steps: int = 4,
+        client=None,
+    ) -> str:
+        """
+        Version async de generate_image : l'attente du résultat ne bloque pas la boucle,
+        plusieurs générations peuvent donc tourner sur un seul thread.
         
-        # Appel à l'API
-        output = self.client.run(self.model_name, input=input_params)
+        Args:
+            prompt: Description de l'image à générer
+            style: Style prédéfini optionnel
+            width: Largeur de l'image
+            height: Hauteur de l'image
+            num_inference_steps: Nombre d'étapes d'inférence
+            client: Client Replicate à utiliser (par défaut le client du module)
+            
+        Returns:
+            URL de l'image générée
+        """
+        client = client or self.client
+        input_params = self._prediction_input(prompt, style, width, height, num_inference_steps)
         
-        # Le résultat est une liste d'URLs
-        if isinstance(output, list) and len(output) > 0:
-            image_url = str(output[0])
-        else:
-            image_url = str(output)
+        prediction = await client.predictions.async_create(**self._prediction_target(), input=input_params)
+        while prediction.status not in _TERMINAL_STATUSES:
+            await asyncio.sleep(POLL_INTERVAL)
+            await prediction.async_reload()
         
+        image_url = _prediction_url(prediction)
         print(f"Image generated: {image_url}")
         return image_url
 
@@ -136,40 +184,96 @@ class ReplicateService:
         prompts: list[str],
         style: Optional[str] = None,
         delay_between: float = 1.0,
+        max_workers: int = 4,
     ) -> list[str]:
         """
-        Génère plusieurs images en batch.
+        Génère plusieurs images en parallèle, sur une seule boucle asyncio.
         
         Args:
             prompts: Liste de prompts
             style: Style à appliquer à toutes les images
-            delay_between: Délai entre chaque génération (en secondes)
+            delay_between: Délai entre deux lancements de génération (en secondes)
+            max_workers: Nombre maximum de générations simultanées
             
         Returns:
-            Liste d'URLs des images générées
+            Liste d'URLs des images générées, dans l'ordre des prompts (None en cas d'erreur)
         """
+        if not prompts:
+            return []
+        
+        async def _run() -> list:
+            # Client dédié : son transport async est lié à la boucle créée par asyncio.run
+            client = replicate.Client(api_token=REPLICATE_API_TOKEN)
+            semaphore = asyncio.Semaphore(max_workers)
+            
+            async def _one(i: int, prompt: str) -> str:
+                if delay_between:
+                    await asyncio.sleep(i * delay_between)
+                async with semaphore:
+                    print(f"Generating image {i+1}/{len(prompts)}...")
+                    return await self.generate_image_async(prompt, style, client=client)
+            
+            return await asyncio.gather(
+                *(_one(i, prompt) for i, prompt in enumerate(prompts)),
+                return_exceptions=True,
+            )
+        
         urls = []
-        for i, prompt in enumerate(prompts):
-            print(f"Generating image {i+1}/{len(prompts)}...")
-            try:
-                url = self.generate_image(prompt, style)
-                urls.append(url)
-            except Exception as e:
-                print(f"Error generating image {i+1}: {e}")
+        for i, result in enumerate(asyncio.run(_run())):
+            if isinstance(result, Exception):
+                print(f"Error generating image {i+1}: {result}")
                 urls.append(None)
-            
-            if i < len(prompts) - 1:
-                time.sleep(delay_between)
+            else:
+                urls.append(result)
         
         return urls
 
 
+@functools.lru_cache(maxsize=256)
+def _enhance_prompt(base_prompt: str, style_prompt: Optional[str]) -> str:
+    """
+    Ajoute au prompt les détails de style (mémorisé : les régénérations réutilisent le résultat).
+    
+    Args:
+        base_prompt: Prompt de base décrivant la scène
+        style_prompt: Texte du style prédéfini, ou None pour le style Le Middle par défaut
+    """
+    if style_prompt:
+        enhanced = f"{base_prompt}, {style_prompt}"
+    else:
+        # Ajouter des détails par défaut pour le style Le Middle
+        enhanced = f"{base_prompt}, warm natural lighting, candid authentic moment, film photography style, editorial quality, 35mm aesthetic"
+    
+    # Ajouter des négatifs implicites via le prompt positif
+    return enhanced + ", high quality, professional photography, well-lit"
+
+
+def _prediction_url(prediction) -> str:
+    """
+    Extrait l'URL de l'image d'une prédiction terminée.
+    
+    Args:
+        prediction: Prédiction Replicate dans un statut final
+        
+    Returns:
+        URL de l'image générée
+    """
+    if prediction.status != "succeeded":
+        raise RuntimeError(f"Génération {prediction.status}: {prediction.error}")
+    
+    # Le résultat est une liste d'URLs (ou une URL seule selon le modèle)
+    output = prediction.output
+    if isinstance(output, list) and len(output) > 0:
+        return str(output[0])
+    return str(output)
+
+
 def check_replicate_availability() -> dict:
     """Vérifie si le service Replicate est disponible et configuré."""
     return {
         "package_installed": REPLICATE_AVAILABLE,
         "api_token_configured": bool(REPLICATE_API_TOKEN),
-        "ready": REPLICATE_AVAILABLE and bool(REPLICATE_API_TOKEN),
+        "ready": _REPLICATE_READY,
     }
 
 
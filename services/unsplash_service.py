@@ -1,54 +1,268 @@
 """
 Service pour récupérer des images libres de droit depuis l'API Unsplash.
 """
+import asyncio
+import functools
+import json
 import os
 import random
-from typing import Optional
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from importlib.util import find_spec
+from operator import itemgetter
+from types import MappingProxyType
+from typing import Iterable, Optional, Union
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from config.instagram_config import UNSPLASH_ACCESS_KEY
 
+# orjson (optionnel) : décodage plus rapide des réponses (30 photos par page de recherche)
+try:
+    import orjson
+
+    _loads = orjson.loads
+except ImportError:
+    _loads = json.loads
+
 # URL de base de l'API Unsplash
 UNSPLASH_API_BASE = "https://api.unsplash.com"
 
+# Client async : HTTP/2 si le package h2 est installé, les requêtes simultanées
+# sont alors multiplexées sur une seule connexion
+HTTP2_AVAILABLE = find_spec("h2") is not None
 
-class UnsplashService:
-    """Service pour rechercher et télécharger des images depuis Unsplash."""
+# En-têtes communs à tous les appels (lecture seule), construits une fois à l'import
+_AUTH_HEADERS = (
+    MappingProxyType({
+        "Authorization": f"Client-ID {UNSPLASH_ACCESS_KEY}",
+        "Accept-Version": "v1",
+    })
+    if UNSPLASH_ACCESS_KEY
+    else None
+)
+
+# Nouvelles tentatives sur limite de débit (429, en respectant Retry-After) et erreurs 5xx.
+# 404 n'en fait pas partie : c'est une absence légitime (photo inconnue, aucun résultat).
+_RETRY = Retry(
+    total=5,
+    backoff_factor=0.5,
+    status_forcelist=(429, 500, 502, 503, 504),
+    allowed_methods=frozenset({"GET"}),
+    respect_retry_after_header=True,
+)
+
+
+# Limite de requêtes par heure côté client, un peu sous le quota Unsplash (50/h en mode demo,
+# 5000/h en production : UNSPLASH_RATE_LIMIT=4500) pour absorber les rafales du scheduler
+UNSPLASH_RATE_LIMIT = int(os.getenv("UNSPLASH_RATE_LIMIT", "45"))
+
+# Cache disque des réponses (développement) : UNSPLASH_CACHE=1, nécessite requests-cache
+UNSPLASH_CACHE = os.getenv("UNSPLASH_CACHE") == "1"
+REQUESTS_CACHE_AVAILABLE = find_spec("requests_cache") is not None
+
+
+class _TokenBucket:
+    """
+    Token bucket partagé par les services sync et async d'un même process
+    (le quota Unsplash est par clé d'API, pas par instance).
+    """
+
+    def __init__(self, rate_per_hour: int):
+        self.capacity = float(rate_per_hour)
+        self.rate = rate_per_hour / 3600.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Réserve un jeton et retourne le délai à attendre avant d'envoyer la requête."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def observe(self, headers) -> None:
+        """Aligne le bucket sur le quota restant annoncé par l'API (X-Ratelimit-Remaining)."""
+        remaining = headers.get("X-Ratelimit-Remaining")
+        if remaining is None or not remaining.isdigit():
+            return
+        with self._lock:
+            self.tokens = min(self.tokens, float(remaining))
+
+
+_RATE_LIMITER = _TokenBucket(UNSPLASH_RATE_LIMIT)
+
+# Durée de validité des résultats préchargés par UnsplashService.prefetch (secondes)
+PREFETCH_TTL = 3600
+
+# Signalements de téléchargement envoyés en arrière-plan : un seul thread pour tout le process,
+# quel que soit le nombre d'instances d'UnsplashService (démarré au premier signalement)
+_TRACKER = ThreadPoolExecutor(max_workers=1, thread_name_prefix="unsplash-tracking")
+
+# Photos récupérées par ID : servies sans requête pendant PHOTO_CACHE_TTL secondes,
+# puis revalidées par ETag ; au plus PHOTO_CACHE_SIZE photos par service
+PHOTO_CACHE_TTL = 3600
+PHOTO_CACHE_SIZE = 128
+
+
+class _PhotoCache:
+    """Cache LRU des photos récupérées par ID, avec leur ETag et l'instant de récupération."""
+
+    def __init__(self, maxsize: int = PHOTO_CACHE_SIZE, ttl: float = PHOTO_CACHE_TTL):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = {}  # {photo_id: (instant de récupération, ETag, photo)}
+
+    def get(self, photo_id: str) -> Optional[dict]:
+        """Retourne la photo en cache, même si elle doit être revalidée."""
+        entry = self._entries.get(photo_id)
+        return entry[2] if entry else None
+
+    def fresh(self, photo_id: str) -> Optional[dict]:
+        """Retourne la photo si elle a été récupérée il y a moins de ttl secondes."""
+        entry = self._entries.get(photo_id)
+        if entry and time.monotonic() - entry[0] < self.ttl:
+            return entry[2]
+        return None
+
+    def conditional_headers(self, photo_id: str) -> Optional[dict]:
+        """En-tête If-None-Match pour revalider la photo en cache, si elle a un ETag."""
+        entry = self._entries.get(photo_id)
+        if entry and entry[1]:
+            return {"If-None-Match": entry[1]}
+        return None
+
+    def revalidate(self, photo_id: str) -> Optional[dict]:
+        """Marque la photo en cache comme à jour (réponse 304) et la retourne."""
+        entry = self._entries.get(photo_id)
+        if entry is None:
+            return None
+        self.store(photo_id, entry[1], entry[2])
+        return entry[2]
+
+    def store(self, photo_id: str, etag: Optional[str], photo: dict) -> None:
+        """Ajoute ou remplace une photo, en évinçant la moins récente au-delà de maxsize."""
+        self._entries.pop(photo_id, None)
+        self._entries[photo_id] = (time.monotonic(), etag, photo)
+        if len(self._entries) > self.maxsize:
+            del self._entries[next(iter(self._entries))]
+
+
+# Tailles d'image conservées dans "urls"
+_URL_SIZES = ("thumb", "small", "regular", "full", "raw")
+_get_urls = itemgetter(*_URL_SIZES)
+
+
+def _normalize_photo(photo: dict) -> dict:
+    """
+    Extrait d'une photo de l'API Unsplash les champs utilisés par Le Middle.
     
-    # Queries prédéfinies pour Le Middle (simples pour maximiser les résultats)
-    PRESET_QUERIES = {
-        # Terrasses et cafés
-        "cafe_terrace": "cafe terrace people",
-        "coffee_shop": "coffee shop friends",
-        "bistro_paris": "bistro paris terrace",
-        # Terrasses urbaines (Paris, grandes villes)
-        "terrace_paris": "paris cafe terrace people",
-        "terrace_city": "city terrace outdoor dining",
-        "terrace_toast": "friends toast glasses terrace paris",
-        # Bars
-        "wine_bar": "wine bar friends",
-        "rooftop_bar": "rooftop bar",
-        "bar_night": "bar people night",
-        "happy_hour": "happy hour terrace paris",
-        # Restaurants
-        "restaurant_friends": "restaurant friends dinner",
-        "restaurant_table": "restaurant table food people smiling",
-        "restaurant_dining": "restaurant dinner friends happy",
-        "outdoor_dining": "outdoor dining people",
-        "brunch": "brunch friends",
-        # Ambiance générale (urbain)
-        "friends_drinking": "friends drinks",
-        "aperitif": "paris terrace aperitif",
+    Args:
+        photo: Objet photo brut renvoyé par l'API
+        
+    Returns:
+        Dictionnaire avec les infos de la photo
+    """
+    return {
+        "id": photo["id"],
+        "description": photo.get("description") or photo.get("alt_description", ""),
+        "urls": dict(zip(_URL_SIZES, _get_urls(photo["urls"]))),
+        "user": {
+            "name": photo["user"]["name"],
+            "username": photo["user"]["username"],
+            "link": photo["user"]["links"]["html"],
+        },
+        "download_location": photo["links"]["download_location"],
+        "width": photo["width"],
+        "height": photo["height"],
     }
 
-    # Presets réservés aux posts ambiance (terrasses + restaurants uniquement)
-    AMBIANCE_PRESETS = [
-        "terrace_paris",
-        "terrace_city",
-        "terrace_toast",
-        "restaurant_table",
-        "restaurant_dining",
-    ]
 
+def _new_session() -> requests.Session:
+    """
+    Crée la session HTTP du service : avec UNSPLASH_CACHE=1 (et requests-cache installé),
+    une session dont les réponses sont conservées dans .unsplash_cache.sqlite pendant une heure.
+    
+    Returns:
+        Session requests, avec cache disque si activé
+    """
+    if not (UNSPLASH_CACHE and REQUESTS_CACHE_AVAILABLE):
+        return requests.Session()
+    
+    from requests_cache import DO_NOT_CACHE, CachedSession
+    
+    return CachedSession(
+        cache_name=".unsplash_cache",
+        backend="sqlite",
+        expire_after=3600,
+        cache_control=True,
+        allowable_codes=(200,),
+        match_headers=["Authorization"],
+        # Les signalements de téléchargement doivent toujours atteindre l'API
+        urls_expire_after={"api.unsplash.com/photos/*/download": DO_NOT_CACHE},
+    )
+
+
+def _frozen_queries(queries: dict) -> MappingProxyType:
+    """Fige des presets en lecture seule, avec des queries internées."""
+    return MappingProxyType({key: sys.intern(query) for key, query in queries.items()})
+
+
+# Queries prédéfinies pour Le Middle (simples pour maximiser les résultats)
+PRESET_QUERIES = _frozen_queries({
+    # Terrasses et cafés
+    "cafe_terrace": "cafe terrace people",
+    "coffee_shop": "coffee shop friends",
+    "bistro_paris": "bistro paris terrace",
+    # Terrasses urbaines (Paris, grandes villes)
+    "terrace_paris": "paris cafe terrace people",
+    "terrace_city": "city terrace outdoor dining",
+    "terrace_toast": "friends toast glasses terrace paris",
+    # Bars
+    "wine_bar": "wine bar friends",
+    "rooftop_bar": "rooftop bar",
+    "bar_night": "bar people night",
+    "happy_hour": "happy hour terrace paris",
+    # Restaurants
+    "restaurant_friends": "restaurant friends dinner",
+    "restaurant_table": "restaurant table food people smiling",
+    "restaurant_dining": "restaurant dinner friends happy",
+    "outdoor_dining": "outdoor dining people",
+    "brunch": "brunch friends",
+    # Ambiance générale (urbain)
+    "friends_drinking": "friends drinks",
+    "aperitif": "paris terrace aperitif",
+})
+
+# Presets réservés aux posts ambiance (terrasses + restaurants uniquement)
+AMBIANCE_PRESETS = [
+    "terrace_paris",
+    "terrace_city",
+    "terrace_toast",
+    "restaurant_table",
+    "restaurant_dining",
+]
+
+# Paires (clé, query) précalculées pour le tirage des presets
+_PRESET_ITEMS = tuple(PRESET_QUERIES.items())
+_AMBIANCE_ITEMS = tuple((k, PRESET_QUERIES[k]) for k in AMBIANCE_PRESETS if k in PRESET_QUERIES)
+
+# Résolution clé de preset -> query, liée une fois (sans recherche d'attribut à chaque appel)
+_resolve_query = PRESET_QUERIES.get
+
+
+class UnsplashService:
+    """Service pour rechercher et télécharger des images depuis Unsplash."""
+    
+    # Presets exposés sur la classe (voir les constantes du module)
+    PRESET_QUERIES = PRESET_QUERIES
+    AMBIANCE_PRESETS = AMBIANCE_PRESETS
+    
     def __init__(self):
         """Initialise le service Unsplash."""
         if not UNSPLASH_ACCESS_KEY:
@@ -56,10 +270,47 @@ class UnsplashService:
                 "UNSPLASH_ACCESS_KEY non configuré. Ajoutez-le dans le fichier .env"
             )
         
-        self.headers = {
-            "Authorization": f"Client-ID {UNSPLASH_ACCESS_KEY}",
-            "Accept-Version": "v1",
-        }
+        self.headers = _AUTH_HEADERS
+        
+        # Session HTTP partagée : les appels suivants réutilisent la connexion TLS vers api.unsplash.com
+        self.session = _new_session()
+        self.session.headers.update(self.headers)
+        self.session.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=_RETRY))
+        
+        # Résultats préchargés : {(query, orientation): (instant du chargement, photos restantes)}
+        self._prefetched = {}
+        # Photos déjà récupérées par ID (voir PHOTO_CACHE_TTL)
+        self._photo_cache = _PhotoCache()
+        # Signalements de téléchargement de cette instance encore en cours (voir _TRACKER)
+        self._pending = set()
+
+    def close(self) -> None:
+        """Termine les signalements de téléchargement en cours puis ferme la session HTTP."""
+        wait(list(self._pending))
+        self.session.close()
+
+    def __enter__(self) -> "UnsplashService":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+    def _get(
+        self,
+        url: str,
+        params: Optional[dict] = None,
+        headers: Optional[dict] = None,
+        stream: bool = False,
+    ) -> requests.Response:
+        """GET sur la session, en respectant la limite de débit (UNSPLASH_RATE_LIMIT)."""
+        delay = _RATE_LIMITER.reserve()
+        if delay:
+            time.sleep(delay)
+        response = self.session.get(url, params=params, headers=headers, stream=stream, timeout=30)
+        # Les en-têtes d'une réponse servie par le cache disque ne reflètent plus le quota restant
+        if not getattr(response, "from_cache", False):
+            _RATE_LIMITER.observe(response.headers)
+        return response
 
     def get_random_preset(self, ambiance_only: bool = False) -> tuple[str, str]:
         """
@@ -71,12 +322,8 @@ class UnsplashService:
         Returns:
             Tuple (preset_key, search_query)
         """
-        if ambiance_only:
-            keys = [k for k in self.AMBIANCE_PRESETS if k in self.PRESET_QUERIES]
-        else:
-            keys = list(self.PRESET_QUERIES.keys())
-        key = random.choice(keys)
-        return key, self.PRESET_QUERIES[key]
+        items = _AMBIANCE_ITEMS if ambiance_only else _PRESET_ITEMS
+        return random.choice(items)
 
     def search_photos(
         self,
@@ -98,7 +345,7 @@ class UnsplashService:
             Liste de dictionnaires avec les infos des photos
         """
         # Utiliser le preset si disponible
-        search_query = self.PRESET_QUERIES.get(query, query)
+        search_query = _resolve_query(query, query)
         
         url = f"{UNSPLASH_API_BASE}/search/photos"
         params = {
@@ -108,34 +355,11 @@ class UnsplashService:
             "page": page,
         }
         
-        response = requests.get(url, headers=self.headers, params=params, timeout=30)
+        response = self._get(url, params)
         response.raise_for_status()
         
-        data = response.json()
-        results = []
-        
-        for photo in data.get("results", []):
-            results.append({
-                "id": photo["id"],
-                "description": photo.get("description") or photo.get("alt_description", ""),
-                "urls": {
-                    "thumb": photo["urls"]["thumb"],
-                    "small": photo["urls"]["small"],
-                    "regular": photo["urls"]["regular"],
-                    "full": photo["urls"]["full"],
-                    "raw": photo["urls"]["raw"],
-                },
-                "user": {
-                    "name": photo["user"]["name"],
-                    "username": photo["user"]["username"],
-                    "link": photo["user"]["links"]["html"],
-                },
-                "download_location": photo["links"]["download_location"],
-                "width": photo["width"],
-                "height": photo["height"],
-            })
-        
-        return results
+        data = _loads(response.content)
+        return [_normalize_photo(photo) for photo in data.get("results", [])]
 
     def get_random_photo(
         self,
@@ -153,7 +377,13 @@ class UnsplashService:
             Dictionnaire avec les infos de la photo, ou None si aucun résultat
         """
         # Utiliser le preset si disponible
-        search_query = self.PRESET_QUERIES.get(query, query)
+        search_query = _resolve_query(query, query)
+        
+        # Servir depuis les résultats préchargés (voir prefetch) tant qu'il en reste
+        cached = self._prefetched.get((search_query, orientation))
+        if cached and cached[1] and time.monotonic() - cached[0] < PREFETCH_TTL:
+            photos = cached[1]
+            return photos.pop(random.randrange(len(photos)))
         
         url = f"{UNSPLASH_API_BASE}/photos/random"
         params = {
@@ -161,33 +391,43 @@ class UnsplashService:
             "orientation": orientation,
         }
         
-        response = requests.get(url, headers=self.headers, params=params, timeout=30)
+        response = self._get(url, params)
         
         if response.status_code == 404:
             return None
             
         response.raise_for_status()
-        photo = response.json()
-        
-        return {
-            "id": photo["id"],
-            "description": photo.get("description") or photo.get("alt_description", ""),
-            "urls": {
-                "thumb": photo["urls"]["thumb"],
-                "small": photo["urls"]["small"],
-                "regular": photo["urls"]["regular"],
-                "full": photo["urls"]["full"],
-                "raw": photo["urls"]["raw"],
-            },
-            "user": {
-                "name": photo["user"]["name"],
-                "username": photo["user"]["username"],
-                "link": photo["user"]["links"]["html"],
-            },
-            "download_location": photo["links"]["download_location"],
-            "width": photo["width"],
-            "height": photo["height"],
-        }
+        photo = _loads(response.content)
+        
+        return _normalize_photo(photo)
+
+    def prefetch(
+        self,
+        queries: Iterable[str],
+        orientation: str = "portrait",
+        per_page: int = 30,
+    ) -> dict[str, list[dict]]:
+        """
+        Précharge une page de résultats par requête distincte : les appels suivants à
+        get_random_photo pour ces requêtes piochent dedans au lieu d'appeler l'API
+        (une photo n'est servie qu'une fois, résultats valables PREFETCH_TTL secondes).
+        
+        Args:
+            queries: Termes de recherche ou clés de preset
+            orientation: "portrait", "landscape" ou "squarish"
+            per_page: Nombre de résultats préchargés par requête (max 30)
+            
+        Returns:
+            Dictionnaire {requête: photos préchargées}
+        """
+        results = {}
+        for query in queries:
+            search_query = _resolve_query(query, query)
+            if search_query not in results:
+                photos = self.search_photos(search_query, orientation=orientation, per_page=per_page)
+                self._prefetched[(search_query, orientation)] = (time.monotonic(), list(photos))
+                results[search_query] = photos
+        return results
 
     def get_photo_by_id(self, photo_id: str) -> Optional[dict]:
         """
@@ -201,56 +441,67 @@ class UnsplashService:
         """
         url = f"{UNSPLASH_API_BASE}/photos/{photo_id}"
         
-        response = requests.get(url, headers=self.headers, timeout=30)
+        photo = self._photo_cache.fresh(photo_id)
+        if photo is not None:
+            return photo
+        
+        # Requête conditionnelle si la photo est déjà connue : 304 sans corps si inchangée
+        response = self._get(url, headers=self._photo_cache.conditional_headers(photo_id))
+        
+        if response.status_code == 304:
+            photo = self._photo_cache.revalidate(photo_id)
+            if photo is not None:
+                return photo
         
         if response.status_code == 404:
             return None
             
         response.raise_for_status()
-        photo = response.json()
-        
-        return {
-            "id": photo["id"],
-            "description": photo.get("description") or photo.get("alt_description", ""),
-            "urls": {
-                "thumb": photo["urls"]["thumb"],
-                "small": photo["urls"]["small"],
-                "regular": photo["urls"]["regular"],
-                "full": photo["urls"]["full"],
-                "raw": photo["urls"]["raw"],
-            },
-            "user": {
-                "name": photo["user"]["name"],
-                "username": photo["user"]["username"],
-                "link": photo["user"]["links"]["html"],
-            },
-            "download_location": photo["links"]["download_location"],
-            "width": photo["width"],
-            "height": photo["height"],
-        }
+        photo = _normalize_photo(_loads(response.content))
+        self._photo_cache.store(photo_id, response.headers.get("ETag"), photo)
+        return photo
 
-    def trigger_download(self, photo_id: str) -> str:
+    def trigger_download(self, photo: Union[dict, str]) -> str:
         """
         Signale un téléchargement à Unsplash (requis par leurs guidelines).
         Retourne l'URL de téléchargement.
         
         Args:
-            photo_id: ID de la photo
+            photo: Photo déjà récupérée (dict de search_photos, get_random_photo...) ou son ID ;
+                avec un dict, aucune requête supplémentaire pour relire la photo
             
         Returns:
             URL de téléchargement
         """
-        photo = self.get_photo_by_id(photo_id)
-        if not photo:
-            raise ValueError(f"Photo non trouvée: {photo_id}")
+        photo = self._resolve_photo(photo)
         
-        # Déclencher le download tracking
-        download_location = photo["download_location"]
-        requests.get(download_location, headers=self.headers, timeout=30)
+        # Déclencher le download tracking en arrière-plan : l'appelant n'attend pas la réponse
+        future = _TRACKER.submit(self._ping, photo["download_location"])
+        self._pending.add(future)
+        future.add_done_callback(self._pending.discard)
         
         # Retourner l'URL haute qualité
         return photo["urls"]["full"]
 
+    def _ping(self, url: str) -> None:
+        """Envoie une requête de signalement sans en lire le corps (échec ignoré)."""
+        try:
+            self._get(url, stream=True).close()
+        except requests.RequestException as e:
+            print(f"Signalement Unsplash échoué: {e}")
+
+    def _resolve_photo(self, photo: Union[dict, str]) -> dict:
+        """Retourne la photo telle quelle, ou la récupère si on n'a que son ID."""
+        if isinstance(photo, dict):
+            return photo
+        cached = self._photo_cache.get(photo)
+        if cached is not None:
+            return cached
+        found = self.get_photo_by_id(photo)
+        if not found:
+            raise ValueError(f"Photo non trouvée: {photo}")
+        return found
+
     def get_download_url(self, photo_id: str, quality: str = "regular") -> str:
         """
         Récupère l'URL de téléchargement d'une photo.
@@ -269,8 +520,215 @@ class UnsplashService:
         return photo["urls"].get(quality, photo["urls"]["regular"])
 
 
+class AsyncUnsplashService:
+    """
+    Version async d'UnsplashService : les requêtes lancées en parallèle (asyncio.gather)
+    partagent un client httpx, avec au plus MAX_CONCURRENCY requêtes en vol.
+    """
+    
+    MAX_CONCURRENCY = 8
+    
+    PRESET_QUERIES = PRESET_QUERIES
+    AMBIANCE_PRESETS = AMBIANCE_PRESETS
+    get_random_preset = UnsplashService.get_random_preset
+
+    def __init__(self):
+        """Initialise le service Unsplash async."""
+        if not UNSPLASH_ACCESS_KEY:
+            raise ValueError(
+                "UNSPLASH_ACCESS_KEY non configuré. Ajoutez-le dans le fichier .env"
+            )
+        
+        import httpx
+        
+        self.headers = _AUTH_HEADERS
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            headers=self.headers,
+            timeout=30.0,
+            limits=httpx.Limits(max_connections=self.MAX_CONCURRENCY),
+        )
+        self._sem = asyncio.Semaphore(self.MAX_CONCURRENCY)
+        self._pending = set()
+        self._photo_cache = _PhotoCache()
+
+    async def aclose(self) -> None:
+        """Termine les signalements de téléchargement en cours puis ferme le client HTTP."""
+        if self._pending:
+            await asyncio.gather(*self._pending, return_exceptions=True)
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "AsyncUnsplashService":
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.aclose()
+
+    async def _get(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None):
+        """GET borné par le sémaphore de concurrence et la limite de débit (UNSPLASH_RATE_LIMIT)."""
+        delay = _RATE_LIMITER.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+        async with self._sem:
+            response = await self._client.get(url, params=params, headers=headers)
+        _RATE_LIMITER.observe(response.headers)
+        return response
+
+    async def search_photos(
+        self,
+        query: str,
+        orientation: str = "portrait",
+        per_page: int = 10,
+        page: int = 1,
+    ) -> list[dict]:
+        """Recherche des photos sur Unsplash (voir UnsplashService.search_photos)."""
+        search_query = _resolve_query(query, query)
+        
+        params = {
+            "query": search_query,
+            "orientation": orientation,
+            "per_page": min(per_page, 30),
+            "page": page,
+        }
+        
+        response = await self._get(f"{UNSPLASH_API_BASE}/search/photos", params)
+        response.raise_for_status()
+        
+        data = _loads(response.content)
+        return [_normalize_photo(photo) for photo in data.get("results", [])]
+
+    async def search_photos_many(self, queries: Iterable[str], **kwargs) -> dict[str, list[dict]]:
+        """
+        Lance plusieurs recherches en parallèle (bornées par le sémaphore et la limite de débit).
+        
+        Args:
+            queries: Termes de recherche ou clés de preset
+            **kwargs: Paramètres transmis à search_photos (orientation, per_page, page)
+            
+        Returns:
+            Dictionnaire {query: photos} ; une recherche en échec donne une liste vide
+            sans interrompre les autres
+        """
+        queries = list(dict.fromkeys(queries))
+        results = await asyncio.gather(
+            *(self.search_photos(query, **kwargs) for query in queries),
+            return_exceptions=True,
+        )
+        
+        photos_by_query = {}
+        for query, result in zip(queries, results):
+            if isinstance(result, Exception):
+                print(f"Recherche Unsplash '{query}' échouée: {result}")
+                result = []
+            photos_by_query[query] = result
+        return photos_by_query
+
+    async def get_random_photo(
+        self,
+        query: str,
+        orientation: str = "portrait",
+    ) -> Optional[dict]:
+        """Récupère une photo aléatoire (voir UnsplashService.get_random_photo)."""
+        search_query = _resolve_query(query, query)
+        
+        params = {
+            "query": search_query,
+            "orientation": orientation,
+        }
+        
+        response = await self._get(f"{UNSPLASH_API_BASE}/photos/random", params)
+        
+        if response.status_code == 404:
+            return None
+        
+        response.raise_for_status()
+        return _normalize_photo(_loads(response.content))
+
+    async def get_photo_by_id(self, photo_id: str) -> Optional[dict]:
+        """Récupère les infos d'une photo par son ID (voir UnsplashService.get_photo_by_id)."""
+        photo = self._photo_cache.fresh(photo_id)
+        if photo is not None:
+            return photo
+        
+        response = await self._get(
+            f"{UNSPLASH_API_BASE}/photos/{photo_id}",
+            headers=self._photo_cache.conditional_headers(photo_id),
+        )
+        
+        if response.status_code == 304:
+            photo = self._photo_cache.revalidate(photo_id)
+            if photo is not None:
+                return photo
+        
+        if response.status_code == 404:
+            return None
+        
+        response.raise_for_status()
+        photo = _normalize_photo(_loads(response.content))
+        self._photo_cache.store(photo_id, response.headers.get("ETag"), photo)
+        return photo
+
+    async def trigger_download(self, photo: Union[dict, str]) -> str:
+        """
+        Signale un téléchargement à Unsplash et retourne l'URL haute qualité.
+        Le signalement part en tâche de fond : l'appelant n'attend pas sa réponse.
+        """
+        if not isinstance(photo, dict):
+            photo_id = photo
+            photo = self._photo_cache.get(photo_id) or await self.get_photo_by_id(photo_id)
+            if not photo:
+                raise ValueError(f"Photo non trouvée: {photo_id}")
+        
+        # Déclencher le download tracking (référence gardée jusqu'à la fin de la tâche)
+        task = asyncio.create_task(self._ping(photo["download_location"]))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+        
+        return photo["urls"]["full"]
+
+    async def _ping(self, url: str) -> None:
+        """Envoie une requête de signalement (échec ignoré, voir UnsplashService._ping)."""
+        import httpx
+        
+        try:
+            await self._get(url)
+        except httpx.HTTPError as e:
+            print(f"Signalement Unsplash échoué: {e}")
+
+    async def get_download_url(self, photo_id: str, quality: str = "regular") -> str:
+        """Récupère l'URL de téléchargement d'une photo (voir UnsplashService.get_download_url)."""
+        photo = await self.get_photo_by_id(photo_id)
+        if not photo:
+            raise ValueError(f"Photo non trouvée: {photo_id}")
+        
+        return photo["urls"].get(quality, photo["urls"]["regular"])
+
+
+def search_photos_many_sync(queries: Iterable[str], **kwargs) -> dict[str, list[dict]]:
+    """
+    Version synchrone d'AsyncUnsplashService.search_photos_many, pour les appelants hors boucle asyncio.
+    
+    Args:
+        queries: Termes de recherche ou clés de preset
+        **kwargs: Paramètres transmis à search_photos (orientation, per_page, page)
+        
+    Returns:
+        Dictionnaire {query: photos}
+    """
+    async def _run() -> dict[str, list[dict]]:
+        async with AsyncUnsplashService() as service:
+            return await service.search_photos_many(queries, **kwargs)
+    
+    return asyncio.run(_run())
+
+
+@functools.lru_cache(maxsize=1)
 def check_unsplash_availability() -> dict:
-    """Vérifie si le service Unsplash est disponible et configuré."""
+    """
+    Vérifie si le service Unsplash est disponible et configuré.
+    La clé est lue une fois à l'import de la configuration : le résultat est
+    calculé une seule fois (check_unsplash_availability.cache_clear() pour le recalculer).
+    """
     return {
         "api_key_configured": bool(UNSPLASH_ACCESS_KEY),
         "ready": bool(UNSPLASH_ACCESS_KEY),
@@ -0,0 +1,86 @@
+"""
+Tests des générations synchrones de ClaudeService, sans appel réseau :
+le client Anthropic est remplacé par un faux client qui renvoie un appel d'outil.
+"""
+import unittest
+from types import SimpleNamespace
+from unittest import mock
+
+from services import claude_service
+from services.claude_schemas import ChiffreOutput
+
+
+CHIFFRE_TOOL_INPUT = {
+    "content": {"context_text": "Temps moyen de trajet", "number": 47, "unit_text": "minutes"},
+    "caption": {"main": "47 minutes pour un apéro.", "hashtags": ["paris", "transports"]},
+    "category": "temps_trajet",
+}
+
+
+class _FakeStream:
+    """Stream de messages qui renvoie un unique appel à l'outil de sortie."""
+
+    def __init__(self, tool_name: str, tool_input: dict):
+        self._message = SimpleNamespace(
+            content=[SimpleNamespace(type="tool_use", name=tool_name, input=tool_input)]
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def get_final_message(self):
+        return self._message
+
+
+class _FakeMessages:
+    """Remplace client.messages : enregistre les paramètres de chaque requête."""
+
+    def __init__(self, tool_name: str, tool_input: dict):
+        self.calls = []
+        self._tool_name = tool_name
+        self._tool_input = tool_input
+
+    def stream(self, **params):
+        self.calls.append(params)
+        return _FakeStream(self._tool_name, self._tool_input)
+
+
+class GenerateChiffreTest(unittest.TestCase):
+    """generate_chiffre passe par le chemin synchrone complet (prompt, outil, validation)."""
+
+    def setUp(self):
+        # Les schémas de sortie sont importés avec le SDK, normalement par _get_client
+        claude_service._ensure_sdk()
+        self.messages = _FakeMessages(ChiffreOutput.tool_name, CHIFFRE_TOOL_INPUT)
+        client = SimpleNamespace(messages=self.messages)
+        patches = [
+            mock.patch.object(claude_service, "ANTHROPIC_AVAILABLE", True),
+            mock.patch.object(claude_service, "ANTHROPIC_API_KEY", "test-key"),
+            mock.patch.object(claude_service, "RESPONSE_CACHE_DIR", None),
+            mock.patch.object(claude_service, "_get_client", return_value=client),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.service = claude_service.ClaudeService()
+
+    def test_generate_chiffre_returns_validated_output(self):
+        result = self.service.generate_chiffre()
+
+        self.assertEqual(result["category"], "temps_trajet")
+        self.assertEqual(result["content"]["number"], "47")
+        self.assertIn("lemiddle", result["caption"]["hashtags"])
+        self.assertEqual(len(self.messages.calls), 1)
+
+    def test_generate_chiffre_accepts_use_cache(self):
+        result = self.service.generate_chiffre("temps_trajet", use_cache=True)
+
+        self.assertEqual(result["category"], "temps_trajet")
+        self.assertEqual(len(self.messages.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
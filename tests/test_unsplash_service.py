@@ -0,0 +1,87 @@
+"""
+Tests du cache disque optionnel d'UnsplashService (UNSPLASH_CACHE=1, requests-cache),
+sans appel réseau : les requêtes passent par un faux adaptateur HTTP.
+"""
+import io
+import os
+import tempfile
+import unittest
+from importlib.util import find_spec
+from unittest import mock
+
+from requests.adapters import HTTPAdapter
+from urllib3 import HTTPResponse
+
+from services import unsplash_service
+
+
+DOWNLOAD_URL = "https://api.unsplash.com/photos/Dwu85P9SOIk/download?ixid=M3w1MjM0NTZ8MHwxfGFsbHx8fHx8fHx8"
+SEARCH_URL = "https://api.unsplash.com/search/photos?query=wine+bar+friends&orientation=portrait"
+
+
+class _FakeAdapter(HTTPAdapter):
+    """Adaptateur qui répond 200 à toute requête et enregistre les URLs réellement envoyées."""
+
+    def __init__(self):
+        super().__init__()
+        self.sent = []
+
+    def send(self, request, **kwargs):
+        self.sent.append(request.url)
+        raw = HTTPResponse(
+            body=io.BytesIO(b"{}"),
+            status=200,
+            headers={"Content-Type": "application/json"},
+            preload_content=False,
+        )
+        return self.build_response(request, raw)
+
+
+@unittest.skipUnless(find_spec("requests_cache"), "requests-cache n'est pas installé")
+class CachedSessionTest(unittest.TestCase):
+    """Avec UNSPLASH_CACHE=1, la session met en cache l'API sauf les signalements de téléchargement."""
+
+    def setUp(self):
+        # Le cache SQLite est créé dans le répertoire courant : travailler dans un dossier temporaire
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.addCleanup(os.chdir, os.getcwd())
+        os.chdir(tmp_dir.name)
+
+        # UNSPLASH_CACHE est lu à l'import du module
+        patch = mock.patch.object(unsplash_service, "UNSPLASH_CACHE", True)
+        patch.start()
+        self.addCleanup(patch.stop)
+
+        self.session = unsplash_service._new_session()
+        self.addCleanup(self.session.close)
+        self.adapter = _FakeAdapter()
+        self.session.mount("https://", self.adapter)
+
+    def test_download_pings_expire_as_do_not_cache(self):
+        from requests_cache import DO_NOT_CACHE, CachedSession
+        from requests_cache.policy.expiration import get_url_expiration
+
+        self.assertIsInstance(self.session, CachedSession)
+        urls_expire_after = self.session.settings.urls_expire_after
+        self.assertEqual(get_url_expiration(DOWNLOAD_URL, urls_expire_after), DO_NOT_CACHE)
+        self.assertIsNone(get_url_expiration(SEARCH_URL, urls_expire_after))
+
+    def test_download_pings_always_reach_the_api(self):
+        first = self.session.get(DOWNLOAD_URL)
+        second = self.session.get(DOWNLOAD_URL)
+
+        self.assertFalse(first.from_cache)
+        self.assertFalse(second.from_cache)
+        self.assertEqual(self.adapter.sent.count(DOWNLOAD_URL), 2)
+
+    def test_api_responses_are_served_from_cache(self):
+        self.session.get(SEARCH_URL)
+        second = self.session.get(SEARCH_URL)
+
+        self.assertTrue(second.from_cache)
+        self.assertEqual(len(self.adapter.sent), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()